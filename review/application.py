@@ -17,6 +17,8 @@ class ReviewApplication(Adw.Application):
         icons_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icons')
         icon_theme.add_search_path(icons_path)
 
+        # Single data store for the whole application, shared by every window,
+        # view and dialog. Closed in do_shutdown.
         self.logic = RevisionLogic()
         
         # Check immediately on startup
@@ -26,6 +28,12 @@ class ReviewApplication(Adw.Application):
         # 4 hours * 60 mins * 60 secs * 1000 ms = 14400000
         GLib.timeout_add(14400000, self.on_timeout_check)
 
+    def do_shutdown(self):
+        if self.logic:
+            self.logic.db.close()
+            self.logic = None
+        Adw.Application.do_shutdown(self)
+
     def on_timeout_check(self):
         self.check_and_notify_revisions(self.logic)
         return True # Return True to keep the timeout active
@@ -43,7 +51,7 @@ class ReviewApplication(Adw.Application):
 
         win = self.get_active_window()
         if not win:
-            win = ReviewWindow(application=self)
+            win = ReviewWindow(application=self, logic=self.logic)
         win.present()
 
     def send_notification(self, title, body):
@@ -62,7 +70,7 @@ class ReviewApplication(Adw.Application):
         today = datetime.now().strftime('%Y-%m-%d')
         revisions = logic.get_upcoming_revisions(today)
         
-        pending_count = sum(1 for rev in revisions if rev[3] == 'pending')
+        pending_count = sum(1 for rev in revisions if rev.status == 'pending')
         
         if pending_count > 0:
             title = "Estudos Pendentes"
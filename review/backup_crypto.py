@@ -0,0 +1,208 @@
+import os
+import struct
+import base64
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+# Encrypted backup container, version 1:
+#
+#   header: MAGIC | version u8 | kdf u8 | iterations u32 | salt (16)
+#           | chunk_size u32 | nonce_prefix (7)
+#   frames: length u32 | AES-256-GCM(chunk), repeated
+#
+# Each frame's 96-bit nonce is nonce_prefix | frame counter u32 | last-frame
+# flag u8, and the whole header is authenticated as associated data, so frames
+# can't be reordered, dropped, truncated or re-parameterised without failing
+# decryption. Integers are big-endian.
+#
+# progress callbacks receive (stage, fraction) with stage in 'read', 'kdf',
+# 'encrypt' and 'decrypt'; an exception raised from one aborts the operation.
+MAGIC = b"REVIEWBK"
+FORMAT_VERSION = 1
+KDF_PBKDF2_SHA256 = 1
+KDF_ITERATIONS = 600000
+SALT_SIZE = 16
+NONCE_PREFIX_SIZE = 7
+CHUNK_SIZE = 1024 * 1024
+GCM_TAG_SIZE = 16
+
+# Header values accepted on decryption. They are only authenticated once a
+# frame decrypts, so a damaged or crafted file must not pick the KDF cost or
+# the size of a single read.
+MAX_KDF_ITERATIONS = 10 * KDF_ITERATIONS
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+_HEADER = struct.Struct(f">{len(MAGIC)}sBBI{SALT_SIZE}sI{NONCE_PREFIX_SIZE}s")
+_FRAME_LENGTH = struct.Struct(">I")
+
+# Older exports: 16-byte salt followed by a single Fernet token
+LEGACY_SALT_SIZE = 16
+LEGACY_KDF_ITERATIONS = 100000
+
+class InvalidPassword(Exception):
+    """Wrong password, or the file was modified after it was encrypted."""
+
+class UnsupportedFormat(Exception):
+    """The container was written by a newer version of Review, or its header asks for out-of-range parameters."""
+
+def is_container(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def derive_key(password, salt, iterations=KDF_ITERATIONS):
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations)
+    return kdf.derive(password.encode())
+
+def _nonce(prefix, index, is_last):
+    return prefix + struct.pack(">IB", index, 1 if is_last else 0)
+
+def _default_workers():
+    return min(4, os.cpu_count() or 1)
+
+def _read_chunks(f, chunk_size):
+    """Yields (index, chunk, is_last), reading one chunk ahead to spot the end."""
+    index = 0
+    current = f.read(chunk_size)
+    while True:
+        following = f.read(chunk_size) if len(current) == chunk_size else b""
+        is_last = not following
+        yield index, current, is_last
+        if is_last:
+            return
+        current = following
+        index += 1
+
+def _read_frames(f, max_length):
+    """Yields (index, ciphertext, is_last) for every frame after the header, none longer than max_length."""
+    def read_frame():
+        raw_length = f.read(_FRAME_LENGTH.size)
+        if not raw_length:
+            return None
+        if len(raw_length) != _FRAME_LENGTH.size:
+            raise InvalidPassword()
+        (length,) = _FRAME_LENGTH.unpack(raw_length)
+        if length > max_length:
+            raise InvalidPassword()
+        frame = f.read(length)
+        if len(frame) != length:
+            raise InvalidPassword()
+        return frame
+
+    index = 0
+    current = read_frame()
+    if current is None:
+        raise InvalidPassword()
+    while current is not None:
+        following = read_frame()
+        yield index, current, following is None
+        current = following
+        index += 1
+
+def _run_pipeline(pool, items, work, write, max_in_flight):
+    """Runs work(item) on the pool with bounded look-ahead, writing results in order."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(work, *item))
+        while len(pending) >= max_in_flight:
+            write(pending.popleft().result())
+    while pending:
+        write(pending.popleft().result())
+
+def encrypt_file(source_path, target_path, password, progress=None,
+                 iterations=KDF_ITERATIONS, chunk_size=CHUNK_SIZE, workers=None):
+    """Encrypts source_path into a version 1 container, one chunk in memory per worker."""
+    salt = os.urandom(SALT_SIZE)
+    nonce_prefix = os.urandom(NONCE_PREFIX_SIZE)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, KDF_PBKDF2_SHA256, iterations,
+                          salt, chunk_size, nonce_prefix)
+    report = progress or (lambda stage, fraction: None)
+    report('kdf', 0.0)
+    aead = AESGCM(derive_key(password, salt, iterations))
+    report('kdf', 1.0)
+    workers = workers or _default_workers()
+    total = os.path.getsize(source_path) or 1
+    written = 0
+
+    def encrypt_chunk(index, chunk, is_last):
+        return len(chunk), aead.encrypt(_nonce(nonce_prefix, index, is_last), chunk, header)
+
+    with open(source_path, 'rb') as src, open(target_path, 'wb') as dst, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        dst.write(header)
+
+        def write(result):
+            nonlocal written
+            plain_size, frame = result
+            dst.write(_FRAME_LENGTH.pack(len(frame)))
+            dst.write(frame)
+            written += plain_size
+            report('encrypt', written / total)
+
+        _run_pipeline(pool, _read_chunks(src, chunk_size), encrypt_chunk, write, workers * 2)
+
+def decrypt_file(source_path, target_path, password, progress=None, workers=None):
+    """Decrypts a version 1 container into target_path, one frame in memory per worker."""
+    report = progress or (lambda stage, fraction: None)
+    workers = workers or _default_workers()
+    total = os.path.getsize(source_path) or 1
+
+    with open(source_path, 'rb') as src:
+        header = src.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise InvalidPassword()
+        magic, version, kdf, iterations, salt, chunk_size, nonce_prefix = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise InvalidPassword()
+        if version != FORMAT_VERSION or kdf != KDF_PBKDF2_SHA256:
+            raise UnsupportedFormat(f"Backup format {version}/{kdf} is not supported")
+        if not 0 < iterations <= MAX_KDF_ITERATIONS or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise UnsupportedFormat(f"Backup parameters {iterations}/{chunk_size} are out of range")
+        report('kdf', 0.0)
+        aead = AESGCM(derive_key(password, salt, iterations))
+        report('kdf', 1.0)
+
+        def decrypt_frame(index, frame, is_last):
+            try:
+                return aead.decrypt(_nonce(nonce_prefix, index, is_last), frame, header)
+            except InvalidTag:
+                raise InvalidPassword()
+
+        with open(target_path, 'wb') as dst, ThreadPoolExecutor(max_workers=workers) as pool:
+            def write(chunk):
+                dst.write(chunk)
+                report('decrypt', src.tell() / total)
+
+            _run_pipeline(pool, _read_frames(src, chunk_size + GCM_TAG_SIZE), decrypt_frame, write, workers * 2)
+
+def decrypt_legacy_file(source_path, target_path, password, progress=None):
+    """Decrypts an export made before the container format (salt + Fernet token).
+
+    Fernet has no streaming mode, so the whole file is held in memory.
+    """
+    from cryptography.fernet import Fernet, InvalidToken
+
+    report = progress or (lambda stage, fraction: None)
+    report('read', 0.0)
+    with open(source_path, 'rb') as f:
+        content = f.read()
+    report('read', 1.0)
+    salt = content[:LEGACY_SALT_SIZE]
+    report('kdf', 0.0)
+    key = base64.urlsafe_b64encode(derive_key(password, salt, LEGACY_KDF_ITERATIONS))
+    report('kdf', 1.0)
+    try:
+        data = Fernet(key).decrypt(content[LEGACY_SALT_SIZE:])
+    except InvalidToken:
+        raise InvalidPassword()
+    report('decrypt', 1.0)
+    with open(target_path, 'wb') as f:
+        f.write(data)
@@ -1,176 +1,899 @@
 import sqlite3
 import os
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from . import backup_crypto
+from .records import Topic, Revision, Area, Tag, Session
+from .snapshots import SnapshotStore, SnapshotCorrupted, is_manifest, DEFAULT_KEEP_LAST, DEFAULT_KEEP_DAILY
 
 # Use XDG_DATA_HOME for Flatpak compatibility
 DATA_DIR = os.path.join(os.path.expanduser('~'), '.local', 'share', 'review')
 os.makedirs(DATA_DIR, exist_ok=True)
 DB_PATH = os.path.join(DATA_DIR, 'topics.db')
 
+# Prepared statements kept per connection. The app runs every query on one
+# shared connection, so this is sized to hold all of them.
+STATEMENT_CACHE_SIZE = 256
+
+# Connection tuning applied at connect time, selected with the 'db_profile' setting.
+# 'performance' uses WAL so a commit costs an append instead of a full fsync of the
+# rollback journal; 'safe' keeps SQLite's durable defaults.
+PRAGMA_PROFILES = {
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,      # negative = KiB, i.e. 16 MiB
+        'mmap_size': 67108864,     # 64 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,      # ms
+    },
+    'safe': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+}
+DEFAULT_PRAGMA_PROFILE = 'performance'
+
+def _parse_bool(value):
+    return value == 'True'
+
+def split_tags(tags):
+    """Splits a comma-separated tags string into unique, trimmed names, keeping their order."""
+    names = (name.strip() for name in (tags or '').split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+# Known settings: key -> (parse, default). The settings table stores text;
+# DatabaseManager keeps the parsed values in memory.
+SETTINGS = {
+    'skip_weekends': (_parse_bool, False),
+    'first_day_of_week': (int, 0),
+    'db_profile': (str, DEFAULT_PRAGMA_PROFILE),
+    'snapshot_dir': (str, None),
+    'snapshot_keep_last': (int, DEFAULT_KEEP_LAST),
+}
+
+# Pages copied per step of the online backup API, between progress callbacks
+BACKUP_PAGES_PER_STEP = 256
+
+# Column order of the Topic record, for queries joining `areas a ON a.id = t.area_id`.
+# Tags and the next pending date are correlated lookups on the topic_tags primary
+# key and idx_revisions_topic_status_date, so listing every topic is still one query.
+TOPIC_COLUMNS = '''t.id, t.title, COALESCE(a.name, ''), t.start_date,
+    (SELECT group_concat(name, ',') FROM (SELECT mt.name FROM topic_tags tt
+     JOIN managed_tags mt ON mt.id = tt.tag_id WHERE tt.topic_id = t.id ORDER BY tt.position)),
+    t.color, t.description, t.time_spent, a.color,
+    (SELECT MIN(nr.scheduled_date) FROM revisions nr
+     WHERE nr.topic_id = t.id AND nr.status = 'pending'),
+    t.area_id'''
+
+# Markers around matched terms in search_topics() snippets; callers swap them for their own markup
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+# bm25 column weights for topics_fts (title, description): title hits rank first
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+SQLITE_HEADER = b"SQLite format 3\000"
+
+class BackupCancelled(Exception):
+    """Raised from a backup progress callback to abort an export or import."""
+
+def _backup_step_progress(progress, stage):
+    """Adapts progress(stage, fraction) to the online backup API's callback."""
+    if progress is None:
+        return None
+    def on_step(status, remaining, total):
+        if total:
+            progress(stage, (total - remaining) / total)
+    return on_step
+
+def _copy_database(source, target_path, progress=None, compact=True, stage='read'):
+    """Copies the source connection page by page into a standalone file."""
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    target = sqlite3.connect(target_path)
+    try:
+        # The backup API reads a consistent snapshot, WAL frames included
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP,
+                      progress=_backup_step_progress(progress, stage), sleep=0)
+        # A backup is a single self-contained file
+        target.execute('PRAGMA journal_mode = DELETE')
+        if compact:
+            target.execute('VACUUM')
+    finally:
+        target.close()
+
+def is_plain_backup(path):
+    with open(path, 'rb') as f:
+        return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+def export_backup(db_path, target_path, password=None, progress=None):
+    """Writes a snapshot of the database at db_path to target_path, encrypted when a password is given.
+
+    Opens its own connection, so it can run on a worker thread while the UI
+    keeps using its own. progress(stage, fraction) is called for the 'read',
+    'kdf', 'encrypt' and 'write' stages; raising from it (BackupCancelled)
+    aborts the export and leaves target_path untouched.
+    """
+    if password and not backup_crypto.CRYPTO_AVAILABLE:
+        return "CRYPTO_MISSING"
+    report = progress or (lambda stage, fraction: None)
+    partial_path = target_path + '.part'
+    plain_path = partial_path
+    if password:
+        fd, plain_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    try:
+        source = sqlite3.connect(db_path)
+        try:
+            _copy_database(source, plain_path, progress)
+        finally:
+            source.close()
+        if password:
+            backup_crypto.encrypt_file(plain_path, partial_path, password, progress=progress)
+        report('write', 0.0)
+        os.replace(partial_path, target_path)
+        report('write', 1.0)
+        return True
+    finally:
+        for path in (plain_path, partial_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+def export_snapshot(db_path, backup_dir, keep_last=DEFAULT_KEEP_LAST,
+                    keep_daily=DEFAULT_KEEP_DAILY, progress=None):
+    """Adds an incremental snapshot of the database at db_path to backup_dir, then prunes old ones.
+
+    Only blocks that no kept snapshot already has are written. The copy is
+    not vacuumed, so unchanged pages keep their place and their blocks.
+    Returns (snapshot_id, blocks_written, removed_ids). Safe to run on a worker thread.
+    """
+    store = SnapshotStore(backup_dir)
+    fd, plain_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        source = sqlite3.connect(db_path)
+        try:
+            _copy_database(source, plain_path, progress, compact=False)
+        finally:
+            source.close()
+        snapshot_id, written = store.add(plain_path, progress)
+    finally:
+        os.remove(plain_path)
+    return snapshot_id, written, store.prune(keep_last, keep_daily)
+
+def stage_import(source_path, password=None, progress=None):
+    """Turns a backup file into a plain SQLite file ready for stage_restore.
+
+    source_path may also be a snapshot manifest, whose blocks are reassembled.
+    Returns (result, plain_path): result is True or one of "PASSWORD_REQUIRED",
+    "INVALID_PASSWORD", "CRYPTO_MISSING", "UNSUPPORTED_FORMAT" and
+    "SNAPSHOT_CORRUPTED". plain_path
+    is source_path itself for unencrypted backups, otherwise a temporary file
+    the caller removes. Touches no connection, so it can run on a worker thread.
+    """
+    if is_plain_backup(source_path):
+        return True, source_path
+    if is_manifest(source_path):
+        fd, plain_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            SnapshotStore.for_manifest(source_path).restore(source_path, plain_path, progress)
+        except SnapshotCorrupted as e:
+            print(f"Error restoring snapshot: {e}")
+            os.remove(plain_path)
+            return "SNAPSHOT_CORRUPTED", None
+        except BaseException:
+            os.remove(plain_path)
+            raise
+        return True, plain_path
+    if not password:
+        return "PASSWORD_REQUIRED", None
+    if not backup_crypto.CRYPTO_AVAILABLE:
+        return "CRYPTO_MISSING", None
+
+    fd, plain_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    result = True
+    try:
+        if backup_crypto.is_container(source_path):
+            backup_crypto.decrypt_file(source_path, plain_path, password, progress=progress)
+        else:
+            backup_crypto.decrypt_legacy_file(source_path, plain_path, password, progress=progress)
+    except backup_crypto.InvalidPassword:
+        result = "INVALID_PASSWORD"
+    except backup_crypto.UnsupportedFormat:
+        result = "UNSUPPORTED_FORMAT"
+    except BaseException:
+        os.remove(plain_path)
+        raise
+    if result is not True:
+        os.remove(plain_path)
+        return result, None
+    return True, plain_path
+
+def stage_restore(db_path, plain_path, progress=None):
+    """Builds the file that will replace the database at db_path from a plain backup.
+
+    The copy lands next to db_path and is migrated to the current schema, so
+    DatabaseManager.swap_in only has to rename it. Touches no connection of
+    db_path, so it can run on a worker thread; progress is reported as the
+    'write' stage. Returns the path of the staged file.
+    """
+    restore_path = db_path + '.restore'
+    try:
+        source = sqlite3.connect(plain_path)
+        try:
+            _copy_database(source, restore_path, progress, compact=False, stage='write')
+        finally:
+            source.close()
+        # Older backups are brought up to the current schema before going live
+        DatabaseManager(restore_path).close()
+    except BaseException:
+        for path in (restore_path, restore_path + '-wal', restore_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return restore_path
+
+def _fts_query(text):
+    """Turns free text into an FTS5 query: every word must match, as a prefix."""
+    words = text.split()
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+def _table_columns(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in cursor.fetchall()}
+
+def _migrate_base_schema(cursor):
+    """Version 1: the original tables, plus columns added before versioning existed."""
+    # Topics table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            area TEXT,
+            start_date TEXT NOT NULL,
+            tags TEXT,
+            color TEXT,
+            description TEXT,
+            time_spent INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Revisions table
+    # Status can be: 'pending', 'studied', 'missed'
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS revisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic_id INTEGER NOT NULL,
+            scheduled_date TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            interval_days INTEGER,
+            FOREIGN KEY (topic_id) REFERENCES topics (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Areas table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS areas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            color TEXT
+        )
+    ''')
+
+    # Managed Tags table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS managed_tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            color TEXT
+        )
+    ''')
+
+    # Study Sessions table for daily stats
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS study_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic_id INTEGER NOT NULL,
+            duration_seconds INTEGER NOT NULL,
+            session_date TEXT NOT NULL,
+            FOREIGN KEY (topic_id) REFERENCES topics (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Settings table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+    # Databases created before versioning may lack these columns
+    topic_columns = _table_columns(cursor, 'topics')
+    if 'description' not in topic_columns:
+        cursor.execute('ALTER TABLE topics ADD COLUMN description TEXT')
+    if 'time_spent' not in topic_columns:
+        cursor.execute('ALTER TABLE topics ADD COLUMN time_spent INTEGER DEFAULT 0')
+    if 'color' not in _table_columns(cursor, 'areas'):
+        cursor.execute('ALTER TABLE areas ADD COLUMN color TEXT')
+
+def _migrate_hot_path_indexes(cursor):
+    """Version 2: indexes for the per-day, per-topic and per-session lookups."""
+    # Calendar cells and the Today list filter revisions by day
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_revisions_scheduled_date ON revisions (scheduled_date)')
+    # Per-topic history and "next pending revision" lookups
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_revisions_topic_status_date ON revisions (topic_id, status, scheduled_date)')
+    # Daily study time: covering index, SUM() never touches the table
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_study_sessions_date ON study_sessions (session_date, duration_seconds)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_study_sessions_topic ON study_sessions (topic_id)')
+    # get_topics() orders by area, then title
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_topics_area_title ON topics (area, title)')
+
+def _migrate_study_rollups(cursor):
+    """Version 3: running study-time totals per day, per area and overall, backfilled from study_sessions."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_study_totals (
+            session_date TEXT PRIMARY KEY,
+            duration_seconds INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Keyed by the topic's area name when the time was studied
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS area_study_totals (
+            area TEXT PRIMARY KEY,
+            duration_seconds INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Single row holding the all-time total
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS study_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            duration_seconds INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    cursor.execute('''
+        INSERT OR REPLACE INTO daily_study_totals (session_date, duration_seconds)
+        SELECT session_date, SUM(duration_seconds) FROM study_sessions GROUP BY session_date
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO area_study_totals (area, duration_seconds)
+        SELECT COALESCE(t.area, ''), SUM(s.duration_seconds)
+        FROM study_sessions s LEFT JOIN topics t ON s.topic_id = t.id
+        GROUP BY COALESCE(t.area, '')
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO study_totals (id, duration_seconds)
+        SELECT 1, COALESCE(SUM(duration_seconds), 0) FROM study_sessions
+    ''')
+
+def _delete_topic_orphans(cursor):
+    """Deletes revisions, study sessions and tag links left behind by deleted topics.
+
+    Foreign keys are not enforced, and topic deletion used to leave them, so a
+    reused topic id would inherit them. The study-time rollups keep counting
+    that time, as the statistics did before.
+    """
+    for table in ('revisions', 'study_sessions', 'topic_tags'):
+        if _table_columns(cursor, table):
+            cursor.execute(f'DELETE FROM {table} WHERE topic_id NOT IN (SELECT id FROM topics)')
+
+def _migrate_topic_area_id(cursor):
+    """Version 4: topics reference their area by id (topics.area_id) instead of by name."""
+    _delete_topic_orphans(cursor)
+    # Names typed without a matching areas row become areas, so no topic loses its area
+    cursor.execute('''
+        INSERT OR IGNORE INTO areas (name)
+        SELECT DISTINCT area FROM topics WHERE area IS NOT NULL AND area != ''
+    ''')
+
+    # SQLite can't turn a column into a foreign key in place: rebuild the table
+    cursor.execute('''
+        CREATE TABLE topics_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            area_id INTEGER REFERENCES areas (id) ON DELETE SET NULL,
+            start_date TEXT NOT NULL,
+            tags TEXT,
+            color TEXT,
+            description TEXT,
+            time_spent INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO topics_new (id, title, area_id, start_date, tags, color, description, time_spent)
+        SELECT t.id, t.title, a.id, t.start_date, t.tags, t.color, t.description, t.time_spent
+        FROM topics t LEFT JOIN areas a ON a.name = t.area
+    ''')
+    # Copying explicit ids leaves the new counter at MAX(id); keep handing out
+    # ids above those of topics deleted before the rebuild
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'topics'")
+    row = cursor.fetchone()
+    cursor.execute('DROP TABLE topics')
+    cursor.execute('ALTER TABLE topics_new RENAME TO topics')
+    if row:
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'topics'", (row[0],))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('topics', ?)", (row[0],))
+    # Area filters and the per-area listing order
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_topics_area_id ON topics (area_id, title)')
+
+    # Per-area study totals follow the id too; 0 collects time outside any area
+    cursor.execute('''
+        CREATE TABLE area_study_totals_new (
+            area_id INTEGER PRIMARY KEY,
+            duration_seconds INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO area_study_totals_new (area_id, duration_seconds)
+        SELECT COALESCE(a.id, 0), SUM(s.duration_seconds)
+        FROM area_study_totals s LEFT JOIN areas a ON a.name = s.area
+        GROUP BY COALESCE(a.id, 0)
+    ''')
+    cursor.execute('DROP TABLE area_study_totals')
+    cursor.execute('ALTER TABLE area_study_totals_new RENAME TO area_study_totals')
+
+def _migrate_topic_tags(cursor):
+    """Version 5: topic_tags junction table, filled from the comma-separated topics.tags."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_tags (
+            topic_id INTEGER NOT NULL REFERENCES topics (id) ON DELETE CASCADE,
+            tag_id INTEGER NOT NULL REFERENCES managed_tags (id) ON DELETE CASCADE,
+            PRIMARY KEY (topic_id, tag_id)
+        ) WITHOUT ROWID
+    ''')
+    # The primary key serves per-topic lookups, this one per-tag filtering
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_topic_tags_tag ON topic_tags (tag_id, topic_id)')
+
+    cursor.execute("SELECT id, tags FROM topics WHERE tags IS NOT NULL AND tags != ''")
+    topic_names = [(topic_id, split_tags(tags)) for topic_id, tags in cursor.fetchall()]
+    cursor.executemany('INSERT OR IGNORE INTO managed_tags (name) VALUES (?)',
+                       [(name,) for _, names in topic_names for name in names])
+    cursor.execute('SELECT name, id FROM managed_tags')
+    tag_ids = dict(cursor.fetchall())
+    cursor.executemany('INSERT OR IGNORE INTO topic_tags (topic_id, tag_id) VALUES (?, ?)',
+                       [(topic_id, tag_ids[name]) for topic_id, names in topic_names for name in names])
+    # The column stays (dropping it needs SQLite 3.35) but is no longer read or written
+    cursor.execute('UPDATE topics SET tags = NULL')
+
+def _migrate_topic_search(cursor):
+    """Version 6: topics_fts full-text index over titles and descriptions, kept in sync by triggers."""
+    # External content: the index stores no copy of the text, only the tokens.
+    # remove_diacritics 2 folds accents on both sides ("calculo" finds "Cálculo").
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS topics_fts USING fts5 (
+            title, description,
+            content = 'topics', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS topics_fts_insert AFTER INSERT ON topics BEGIN
+            INSERT INTO topics_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS topics_fts_delete AFTER DELETE ON topics BEGIN
+            INSERT INTO topics_fts (topics_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    ''')
+    # Only text edits reach the index, not time_spent bumps
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS topics_fts_update AFTER UPDATE OF title, description ON topics BEGIN
+            INSERT INTO topics_fts (topics_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO topics_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+    ''')
+    cursor.execute("INSERT INTO topics_fts (topics_fts) VALUES ('rebuild')")
+
+def _migrate_topic_tag_position(cursor):
+    """Version 7: topic_tags.position, the order tags were entered in."""
+    cursor.execute('ALTER TABLE topic_tags ADD COLUMN position INTEGER NOT NULL DEFAULT 0')
+    # Version 5 kept no order; freeze the tag id order shown until now
+    cursor.execute('''
+        UPDATE topic_tags SET position = (
+            SELECT COUNT(*) FROM topic_tags o
+            WHERE o.topic_id = topic_tags.topic_id AND o.tag_id < topic_tags.tag_id
+        )
+    ''')
+
+def _migrate_topic_orphans(cursor):
+    """Version 8: drop rows of deleted topics from databases that went through version 4 before it did."""
+    _delete_topic_orphans(cursor)
+
+# Ordered schema migrations. The position in the list is the schema version
+# stored in PRAGMA user_version; never reorder or edit a shipped step, append a new one.
+MIGRATIONS = [
+    _migrate_base_schema,
+    _migrate_hot_path_indexes,
+    _migrate_study_rollups,
+    _migrate_topic_area_id,
+    _migrate_topic_tags,
+    _migrate_topic_search,
+    _migrate_topic_tag_position,
+    _migrate_topic_orphans,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
 class DatabaseManager:
     def __init__(self, db_path=None):
         if db_path is None:
             db_path = DB_PATH
-        self.conn = sqlite3.connect(db_path)
+        self.db_path = db_path
+        self._transaction_depth = 0
+        self._settings = {}
+        self._setting_subscribers = {}
+        # Identity map: one Topic object per id for the lifetime of the connection
+        self._topics = {}
+        # Bumped whenever this connection's committed data may have changed, so view caches can
+        # tell they are stale; get_data_version() covers commits from other connections
+        self.generation = 0
+        self.conn = self._connect()
         self.create_tables()
+        self._reload_settings()
 
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        
-        # Topics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS topics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                area TEXT,
-                start_date TEXT NOT NULL,
-                tags TEXT,
-                color TEXT,
-                description TEXT,
-                time_spent INTEGER DEFAULT 0
-            )
-        ''')
-        
-        # Revisions table
-        # Status can be: 'pending', 'studied', 'missed'
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS revisions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                topic_id INTEGER NOT NULL,
-                scheduled_date TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                interval_days INTEGER,
-                FOREIGN KEY (topic_id) REFERENCES topics (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Areas table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS areas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                color TEXT
-            )
-        ''')
-        
-        # Managed Tags table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS managed_tags (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                color TEXT
-            )
-        ''')
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+        self._apply_pragmas(conn, self._read_pragma_profile(conn))
+        return conn
 
-        # NEW: Study Sessions table for daily stats
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS study_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                topic_id INTEGER NOT NULL,
-                duration_seconds INTEGER NOT NULL,
-                session_date TEXT NOT NULL,
-                FOREIGN KEY (topic_id) REFERENCES topics (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Settings table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
-        
-        self.conn.commit()
-        
-        # Migration: Add description if not exists
+    def _read_pragma_profile(self, conn):
+        # Read straight from the table: the schema may not exist yet on first run
         try:
-            cursor.execute('ALTER TABLE topics ADD COLUMN description TEXT')
-            self.conn.commit()
+            row = conn.execute("SELECT value FROM settings WHERE key = 'db_profile'").fetchone()
         except sqlite3.OperationalError:
-            pass
+            row = None
+        if row and row[0] in PRAGMA_PROFILES:
+            return row[0]
+        return DEFAULT_PRAGMA_PROFILE
+
+    def _apply_pragmas(self, conn, profile):
+        # journal_mode can't change inside a transaction
+        if conn.in_transaction:
+            conn.commit()
+        for pragma, value in PRAGMA_PROFILES[profile].items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        self.pragma_profile = profile
+
+    def set_pragma_profile(self, profile):
+        """Switches the connection to another entry of PRAGMA_PROFILES and remembers it."""
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown database profile: {profile}")
+        self.set_setting('db_profile', profile)
+        self._apply_pragmas(self.conn, profile)
+
+    def get_pragma_report(self):
+        """Returns the values SQLite actually reports for the tuned pragmas."""
+        report = {}
+        for pragma in PRAGMA_PROFILES[DEFAULT_PRAGMA_PROFILE]:
+            row = self.conn.execute(f'PRAGMA {pragma}').fetchone()
+            report[pragma] = row[0] if row else None
+        return report
+
+    def create_tables(self):
+        """Brings the schema up to SCHEMA_VERSION."""
+        self.migrate()
+
+    def get_schema_version(self):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA user_version')
+        return cursor.fetchone()[0]
+
+    def migrate(self):
+        """Applies pending migrations, each one in its own transaction."""
+        current = self.get_schema_version()
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(f"Database schema version {current} is newer than this version of Review supports ({SCHEMA_VERSION})")
+
+        cursor = self.conn.cursor()
+        for version, step in enumerate(MIGRATIONS[current:], start=current + 1):
+            try:
+                cursor.execute('BEGIN')
+                step(cursor)
+                cursor.execute(f'PRAGMA user_version = {version}')
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    @contextmanager
+    def transaction(self):
+        """Groups writes into a single commit, rolling all of them back on error.
 
-        # Migration: Add time_spent if not exists
+        Mutators called inside the block skip their own commit. Nested blocks
+        join the outermost one.
+        """
+        self._transaction_depth += 1
         try:
-            cursor.execute('ALTER TABLE topics ADD COLUMN time_spent INTEGER DEFAULT 0')
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.rollback()
+                # Cached settings and topics may hold rolled-back writes
+                self._topics.clear()
+                self._reload_settings()
+                self.generation += 1
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
             self.conn.commit()
-        except sqlite3.OperationalError:
-            pass
-            
-        # Migration: Add color to areas if not exists
-        try:
-            cursor.execute('ALTER TABLE areas ADD COLUMN color TEXT')
+            self.generation += 1
+
+    def _commit(self):
+        if self._transaction_depth == 0:
             self.conn.commit()
-        except sqlite3.OperationalError:
-            pass
+            self.generation += 1
+
+    def get_data_version(self):
+        """Changes whenever another connection, such as the bulk importer's, commits to the file."""
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _area_id(self, name):
+        """Returns the id of the area called name, creating it if needed; a blank name is no area."""
+        if not name:
+            return None
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT OR IGNORE INTO areas (name) VALUES (?)', (name,))
+        cursor.execute('SELECT id FROM areas WHERE name = ?', (name,))
+        return cursor.fetchone()[0]
 
     def add_topic(self, title, area, start_date, tags, color, description=""):
         cursor = self.conn.cursor()
+        with self.transaction():
+            cursor.execute('''
+                INSERT INTO topics (title, area_id, start_date, color, description)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (title, self._area_id(area), start_date, color, description))
+            topic_id = cursor.lastrowid
+            self._set_topic_tags([(topic_id, tags)])
+            return topic_id
+
+    def _set_topic_tags(self, topic_tags):
+        """Replaces the tags of each (topic_id, comma-separated tags) pair, creating unknown tags."""
+        cursor = self.conn.cursor()
+        topic_names = [(topic_id, split_tags(tags)) for topic_id, tags in topic_tags]
+        cursor.executemany('INSERT OR IGNORE INTO managed_tags (name) VALUES (?)',
+                           [(name,) for _, names in topic_names for name in names])
+        tag_ids = self.get_tag_ids_by_name()
+        cursor.executemany('DELETE FROM topic_tags WHERE topic_id = ?',
+                           [(topic_id,) for topic_id, _ in topic_names])
+        cursor.executemany('INSERT OR IGNORE INTO topic_tags (topic_id, tag_id, position) VALUES (?, ?, ?)',
+                           [(topic_id, tag_ids[name], position) for topic_id, names in topic_names
+                            for position, name in enumerate(names)])
+
+    def _refresh_tags(self):
+        """Re-reads the tags of every mapped topic after a tag was renamed or deleted."""
+        if not self._topics:
+            return
+        cursor = self.conn.cursor()
         cursor.execute('''
-            INSERT INTO topics (title, area, start_date, tags, color, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (title, area, start_date, tags, color, description))
-        topic_id = cursor.lastrowid
-        self.conn.commit()
-        return topic_id
+            SELECT topic_id, group_concat(name, ',') FROM (
+                SELECT tt.topic_id, mt.name
+                FROM topic_tags tt JOIN managed_tags mt ON mt.id = tt.tag_id
+                ORDER BY tt.topic_id, tt.position
+            ) GROUP BY topic_id
+        ''')
+        tags = dict(cursor.fetchall())
+        for topic in self._topics.values():
+            topic.tags = tags.get(topic.id)
+
+    def _topic_from_row(self, row):
+        # Reuse the mapped object so every holder sees the fresh values
+        topic = self._topics.get(row[0])
+        if topic is None:
+            topic = self._topics[row[0]] = Topic(*row)
+        else:
+            topic.assign(*row)
+        return topic
 
     def get_topics(self):
         cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT t.*, a.color 
-            FROM topics t 
-            LEFT JOIN areas a ON t.area = a.name 
-            ORDER BY t.area, t.title
+        cursor.execute(f'''
+            SELECT {TOPIC_COLUMNS}
+            FROM topics t
+            LEFT JOIN areas a ON a.id = t.area_id
+            ORDER BY a.name, t.title
         ''')
-        return cursor.fetchall()
+        topics = [self._topic_from_row(row) for row in cursor.fetchall()]
+        # Anything not returned was deleted behind our back
+        self._topics = {topic.id: topic for topic in topics}
+        return topics
+
+    def get_revisions_with_topics(self, date_str):
+        """Returns (Revision, Topic) pairs scheduled for date_str, pending first, from one query."""
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT r.id, r.topic_id, r.scheduled_date, r.status, r.interval_days,
+                   t.title, COALESCE(a.name, ''), COALESCE(a.color, t.color), {TOPIC_COLUMNS}
+            FROM revisions r
+            JOIN topics t ON r.topic_id = t.id
+            LEFT JOIN areas a ON a.id = t.area_id
+            WHERE r.scheduled_date = ?
+            ORDER BY r.status ASC, t.title ASC
+        ''', (date_str,))
+        return [(Revision(*row[:8]), self._topic_from_row(row[8:])) for row in cursor.fetchall()]
+
+    def get_topic(self, topic_id):
+        """Returns the Topic with this id, from the identity map when already loaded."""
+        topic = self._topics.get(topic_id)
+        if topic is None:
+            topic = self._load_topic(topic_id)
+        return topic
+
+    def _load_topic(self, topic_id):
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT {TOPIC_COLUMNS}
+            FROM topics t
+            LEFT JOIN areas a ON a.id = t.area_id
+            WHERE t.id = ?
+        ''', (topic_id,))
+        row = cursor.fetchone()
+        return self._topic_from_row(row) if row else None
+
+    def search_topics(self, query, limit=50):
+        """Full-text search over titles and descriptions, best match first.
+
+        Every word of query must match as a prefix, ignoring case and accents.
+        Returns (Topic, snippet) pairs; the snippet wraps matched terms in
+        SNIPPET_START/SNIPPET_END. limit=None returns every match.
+        """
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT {TOPIC_COLUMNS},
+                   snippet(topics_fts, -1, ?, ?, '…', 12)
+            FROM topics_fts
+            JOIN topics t ON t.id = topics_fts.rowid
+            LEFT JOIN areas a ON a.id = t.area_id
+            WHERE topics_fts MATCH ?
+            ORDER BY bm25(topics_fts, ?, ?)
+            LIMIT ?
+        ''', (SNIPPET_START, SNIPPET_END, fts_query, *SEARCH_WEIGHTS, -1 if limit is None else limit))
+        return [(self._topic_from_row(row[:-1]), row[-1]) for row in cursor.fetchall()]
+
+    def get_topics_by_tags(self, any_of=(), all_of=()):
+        """Returns topics carrying at least one tag of any_of and every tag of all_of (tag names)."""
+        any_of, all_of = list(any_of), list(dict.fromkeys(all_of))
+        conditions, params = [], []
+        if any_of:
+            conditions.append(f'''t.id IN (
+                SELECT tt.topic_id FROM topic_tags tt JOIN managed_tags mt ON mt.id = tt.tag_id
+                WHERE mt.name IN ({', '.join('?' * len(any_of))}))''')
+            params += any_of
+        if all_of:
+            conditions.append(f'''t.id IN (
+                SELECT tt.topic_id FROM topic_tags tt JOIN managed_tags mt ON mt.id = tt.tag_id
+                WHERE mt.name IN ({', '.join('?' * len(all_of))})
+                GROUP BY tt.topic_id HAVING COUNT(*) = ?)''')
+            params += all_of + [len(all_of)]
+        if not conditions:
+            return self.get_topics()
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT {TOPIC_COLUMNS}
+            FROM topics t
+            LEFT JOIN areas a ON a.id = t.area_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY a.name, t.title
+        ''', params)
+        return [self._topic_from_row(row) for row in cursor.fetchall()]
+
+    def _refresh_areas(self):
+        """Re-joins the area name and color of every mapped topic after an area changed."""
+        if not self._topics:
+            return
+        areas = {area.id: area for area in self.get_areas()}
+        for topic in self._topics.values():
+            area = areas.get(topic.area_id)
+            if area is None:
+                topic.area_id, topic.area, topic.area_color = None, '', None
+            else:
+                topic.area, topic.area_color = area.name, area.color
+
+    def add_topics_many(self, topics):
+        """Inserts (title, area, start_date, tags, color, description) rows, returning their ids in order."""
+        cursor = self.conn.cursor()
+        with self.transaction():
+            names = {row[1] for row in topics if row[1]}
+            cursor.executemany('INSERT OR IGNORE INTO areas (name) VALUES (?)', [(name,) for name in names])
+            area_ids = self.get_area_ids_by_name()
+            # lastrowid per row: a MAX(id) read before the write lock can't rule out
+            # inserts from another connection (RETURNING would need SQLite 3.35)
+            topic_ids = []
+            for title, area, start_date, tags, color, description in topics:
+                cursor.execute('''
+                    INSERT INTO topics (title, area_id, start_date, color, description)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (title, area_ids.get(area), start_date, color, description))
+                topic_ids.append(cursor.lastrowid)
+            self._set_topic_tags([(topic_id, row[3]) for topic_id, row in zip(topic_ids, topics)])
+            return topic_ids
 
     def get_areas(self):
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM areas ORDER BY name')
-        return cursor.fetchall()
+        cursor.execute('SELECT id, name, color FROM areas ORDER BY name')
+        return [Area(*row) for row in cursor.fetchall()]
 
     def add_area(self, name, color=None):
         cursor = self.conn.cursor()
         try:
             cursor.execute('INSERT INTO areas (name, color) VALUES (?, ?)', (name, color))
-            self.conn.commit()
+            self._commit()
             return cursor.lastrowid
         except sqlite3.IntegrityError:
             return None
 
+    def add_areas_many(self, areas):
+        """Inserts (name, color) rows, skipping names that already exist."""
+        cursor = self.conn.cursor()
+        cursor.executemany('INSERT OR IGNORE INTO areas (name, color) VALUES (?, ?)', areas)
+        self._commit()
+
     def delete_area(self, area_id):
+        """Deletes the area; its topics are kept, without an area."""
         cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM areas WHERE id = ?', (area_id,))
-        self.conn.commit()
+        with self.transaction():
+            # ON DELETE SET NULL, done by hand: foreign key enforcement is off
+            cursor.execute('UPDATE topics SET area_id = NULL WHERE area_id = ?', (area_id,))
+            cursor.execute('DELETE FROM areas WHERE id = ?', (area_id,))
+        self._refresh_areas()
 
     def update_area(self, area_id, name, color):
+        # Topics hold the id, so a rename is this single row
         cursor = self.conn.cursor()
         cursor.execute('UPDATE areas SET name = ?, color = ? WHERE id = ?', (name, color, area_id))
-        self.conn.commit()
+        self._commit()
+        self._refresh_areas()
 
     def get_managed_tags(self):
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM managed_tags ORDER BY name')
-        return cursor.fetchall()
+        cursor.execute('SELECT id, name, color FROM managed_tags ORDER BY name')
+        return [Tag(*row) for row in cursor.fetchall()]
 
     def add_managed_tag(self, name, color):
         cursor = self.conn.cursor()
         try:
             cursor.execute('INSERT INTO managed_tags (name, color) VALUES (?, ?)', (name, color))
-            self.conn.commit()
+            self._commit()
             return cursor.lastrowid
         except sqlite3.IntegrityError:
             return None
 
+    def add_managed_tags_many(self, tags):
+        """Inserts (name, color) rows, skipping names that already exist."""
+        cursor = self.conn.cursor()
+        cursor.executemany('INSERT OR IGNORE INTO managed_tags (name, color) VALUES (?, ?)', tags)
+        self._commit()
+
     def delete_managed_tag(self, tag_id):
+        """Deletes the tag and removes it from every topic."""
         cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM managed_tags WHERE id = ?', (tag_id,))
-        self.conn.commit()
+        with self.transaction():
+            cursor.execute('DELETE FROM topic_tags WHERE tag_id = ?', (tag_id,))
+            cursor.execute('DELETE FROM managed_tags WHERE id = ?', (tag_id,))
+        self._refresh_tags()
 
     def update_managed_tag(self, tag_id, name, color):
         cursor = self.conn.cursor()
         cursor.execute('UPDATE managed_tags SET name = ?, color = ? WHERE id = ?', (name, color, tag_id))
-        self.conn.commit()
+        self._commit()
+        self._refresh_tags()
 
     def add_revision(self, topic_id, scheduled_date, interval_days):
         cursor = self.conn.cursor()
@@ -178,26 +901,41 @@ class DatabaseManager:
             INSERT INTO revisions (topic_id, scheduled_date, interval_days)
             VALUES (?, ?, ?)
         ''', (topic_id, scheduled_date, interval_days))
-        self.conn.commit()
+        self._commit()
+
+    def add_revisions_many(self, revisions):
+        """Inserts (topic_id, scheduled_date, interval_days) rows with a single statement."""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            INSERT INTO revisions (topic_id, scheduled_date, interval_days)
+            VALUES (?, ?, ?)
+        ''', revisions)
+        self._commit()
 
     def get_revisions_for_topic(self, topic_id):
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM revisions WHERE topic_id = ? ORDER BY scheduled_date ASC', (topic_id,))
-        return cursor.fetchall()
+        cursor.execute('''
+            SELECT id, topic_id, scheduled_date, status, interval_days
+            FROM revisions WHERE topic_id = ? ORDER BY scheduled_date ASC
+        ''', (topic_id,))
+        return [Revision(*row) for row in cursor.fetchall()]
 
     def update_revision_status(self, revision_id, status):
         cursor = self.conn.cursor()
         cursor.execute('UPDATE revisions SET status = ? WHERE id = ?', (status, revision_id))
-        self.conn.commit()
+        self._commit()
 
     def update_topic(self, topic_id, title, area, start_date, tags, color, description):
         cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE topics 
-            SET title = ?, area = ?, start_date = ?, tags = ?, color = ?, description = ?
-            WHERE id = ?
-        ''', (title, area, start_date, tags, color, description, topic_id))
-        self.conn.commit()
+        with self.transaction():
+            cursor.execute('''
+                UPDATE topics
+                SET title = ?, area_id = ?, start_date = ?, color = ?, description = ?
+                WHERE id = ?
+            ''', (title, self._area_id(area), start_date, color, description, topic_id))
+            self._set_topic_tags([(topic_id, tags)])
+        if topic_id in self._topics:
+            self._load_topic(topic_id)
 
     def update_time_spent(self, topic_id, duration_seconds):
         cursor = self.conn.cursor()
@@ -209,24 +947,60 @@ class DatabaseManager:
             INSERT INTO study_sessions (topic_id, duration_seconds, session_date)
             VALUES (?, ?, ?)
         ''', (topic_id, duration_seconds, today))
+
+        # Keep the rollups in step so stats never re-sum the session history
+        cursor.execute('''
+            INSERT INTO daily_study_totals (session_date, duration_seconds) VALUES (?, ?)
+            ON CONFLICT (session_date) DO UPDATE SET duration_seconds = duration_seconds + excluded.duration_seconds
+        ''', (today, duration_seconds))
+        cursor.execute('''
+            INSERT INTO area_study_totals (area_id, duration_seconds)
+            SELECT COALESCE(area_id, 0), ? FROM topics WHERE id = ?
+            ON CONFLICT (area_id) DO UPDATE SET duration_seconds = duration_seconds + excluded.duration_seconds
+        ''', (duration_seconds, topic_id))
+        cursor.execute('''
+            INSERT INTO study_totals (id, duration_seconds) VALUES (1, ?)
+            ON CONFLICT (id) DO UPDATE SET duration_seconds = duration_seconds + excluded.duration_seconds
+        ''', (duration_seconds,))
         
-        self.conn.commit()
+        self._commit()
+        topic = self._topics.get(topic_id)
+        if topic is not None:
+            topic.time_spent += duration_seconds
 
-    def get_study_time_for_date(self, date_str):
+    def get_study_sessions(self, topic_id):
         cursor = self.conn.cursor()
-        cursor.execute('SELECT SUM(duration_seconds) FROM study_sessions WHERE session_date = ?', (date_str,))
-        result = cursor.fetchone()
-        return result[0] if result[0] is not None else 0
+        cursor.execute('''
+            SELECT id, topic_id, duration_seconds, session_date
+            FROM study_sessions WHERE topic_id = ? ORDER BY session_date
+        ''', (topic_id,))
+        return [Session(*row) for row in cursor.fetchall()]
 
     def update_revision_date(self, revision_id, new_date):
         cursor = self.conn.cursor()
         cursor.execute('UPDATE revisions SET scheduled_date = ? WHERE id = ?', (new_date, revision_id))
-        self.conn.commit()
+        self._commit()
+
+    def update_revision_dates_many(self, changes):
+        """Applies (revision_id, new_date) pairs with a single statement."""
+        cursor = self.conn.cursor()
+        cursor.executemany('UPDATE revisions SET scheduled_date = ? WHERE id = ?',
+                           [(new_date, revision_id) for revision_id, new_date in changes])
+        self._commit()
 
     def delete_topic(self, topic_id):
+        """Deletes the topic with its revisions, study sessions and tag links.
+
+        The study-time rollups keep the time already studied.
+        """
         cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM topics WHERE id = ?', (topic_id,))
-        self.conn.commit()
+        with self.transaction():
+            # ON DELETE CASCADE, done by hand: foreign key enforcement is off
+            cursor.execute('DELETE FROM revisions WHERE topic_id = ?', (topic_id,))
+            cursor.execute('DELETE FROM study_sessions WHERE topic_id = ?', (topic_id,))
+            cursor.execute('DELETE FROM topic_tags WHERE topic_id = ?', (topic_id,))
+            cursor.execute('DELETE FROM topics WHERE id = ?', (topic_id,))
+        self._topics.pop(topic_id, None)
 
     def reset_database(self):
         cursor = self.conn.cursor()
@@ -234,32 +1008,85 @@ class DatabaseManager:
         cursor.execute("DELETE FROM revisions")
         cursor.execute("DELETE FROM areas")
         cursor.execute("DELETE FROM managed_tags")
+        cursor.execute("DELETE FROM topic_tags")
         cursor.execute("DELETE FROM study_sessions")
+        cursor.execute("DELETE FROM daily_study_totals")
+        cursor.execute("DELETE FROM area_study_totals")
+        cursor.execute("DELETE FROM study_totals")
         cursor.execute("DELETE FROM settings")
         # Reset sequences
         cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('topics', 'revisions', 'areas', 'managed_tags', 'study_sessions', 'settings')")
-        self.conn.commit()
+        self._commit()
+        self._topics.clear()
+        self._reload_settings()
 
-    def get_setting(self, key, default=None):
+    def _parse_setting(self, key, raw):
+        parse = SETTINGS[key][0] if key in SETTINGS else str
+        try:
+            return parse(raw)
+        except ValueError:
+            return SETTINGS[key][1]
+
+    def _reload_settings(self):
+        """Re-reads the settings table into the cache, notifying subscribers of changed values."""
         cursor = self.conn.cursor()
-        cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
-        row = cursor.fetchone()
-        return row[0] if row else default
+        cursor.execute('SELECT key, value FROM settings')
+        previous = self._settings
+        self._settings = {key: self._parse_setting(key, raw) for key, raw in cursor.fetchall()}
+        for key in set(previous) | set(self._settings):
+            if previous.get(key) != self._settings.get(key):
+                self._notify_setting(key)
+
+    def _notify_setting(self, key):
+        value = self.get_setting(key)
+        for callback in list(self._setting_subscribers.get(key, [])):
+            callback(key, value)
+
+    def get_setting(self, key, default=None):
+        """Returns the cached, parsed value; unset keys fall back to default, then SETTINGS."""
+        if key in self._settings:
+            return self._settings[key]
+        if default is None and key in SETTINGS:
+            return SETTINGS[key][1]
+        return default
 
     def set_setting(self, key, value):
         cursor = self.conn.cursor()
         cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, str(value)))
-        self.conn.commit()
+        self._commit()
+        value = self._parse_setting(key, str(value))
+        if key not in self._settings or self._settings[key] != value:
+            self._settings[key] = value
+            self._notify_setting(key)
+
+    def subscribe_setting(self, key, callback):
+        """Calls callback(key, value) whenever the setting changes, including on restore and reset."""
+        self._setting_subscribers.setdefault(key, []).append(callback)
+
+    def unsubscribe_setting(self, key, callback):
+        self._setting_subscribers.get(key, []).remove(callback)
 
     def get_area_by_name(self, name):
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM areas WHERE name = ?', (name,))
-        return cursor.fetchone()
+        cursor.execute('SELECT id, name, color FROM areas WHERE name = ?', (name,))
+        row = cursor.fetchone()
+        return Area(*row) if row else None
 
     def get_tag_by_name(self, name):
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM managed_tags WHERE name = ?', (name,))
-        return cursor.fetchone()
+        cursor.execute('SELECT id, name, color FROM managed_tags WHERE name = ?', (name,))
+        row = cursor.fetchone()
+        return Tag(*row) if row else None
+
+    def get_area_ids_by_name(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT name, id FROM areas')
+        return dict(cursor.fetchall())
+
+    def get_tag_ids_by_name(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT name, id FROM managed_tags')
+        return dict(cursor.fetchall())
 
     def is_empty(self):
         cursor = self.conn.cursor()
@@ -269,99 +1096,104 @@ class DatabaseManager:
     def get_study_time_for_date(self, date_str):
         """Get total study time in seconds for a specific date"""
         cursor = self.conn.cursor()
+        cursor.execute('SELECT duration_seconds FROM daily_study_totals WHERE session_date = ?', (date_str,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def get_study_time_between(self, start_date_str, end_date_str):
+        """Total study time in seconds for [start, end], e.g. a week or a month, from the daily rollup."""
+        cursor = self.conn.cursor()
         cursor.execute('''
-            SELECT SUM(duration_seconds) FROM study_sessions 
-            WHERE session_date = ?
-        ''', (date_str,))
-        result = cursor.fetchone()[0]
-        return result if result is not None else 0
-
-    def _derive_key(self, password, salt):
-        from cryptography.hazmat.primitives import hashes
-        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-        import base64
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+            SELECT COALESCE(SUM(duration_seconds), 0) FROM daily_study_totals
+            WHERE session_date BETWEEN ? AND ?
+        ''', (start_date_str, end_date_str))
+        return cursor.fetchone()[0]
+
+    def get_study_time_by_area(self):
+        """Returns {area name: seconds}; time studied outside any area is under ''."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT COALESCE(a.name, ''), SUM(s.duration_seconds)
+            FROM area_study_totals s LEFT JOIN areas a ON a.id = s.area_id
+            GROUP BY COALESCE(a.name, '')
+        ''')
+        return dict(cursor.fetchall())
+
+    def get_total_study_time(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT duration_seconds FROM study_totals WHERE id = 1')
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def restore_file(self, plain_path, progress=None):
+        """Replaces the live database with a plain SQLite file.
+
+        Synchronous wrapper around stage_restore and swap_in.
+        """
+        self.swap_in(stage_restore(self.db_path, plain_path, progress))
+
+    def swap_in(self, restore_path):
+        """Makes a file prepared by stage_restore the live database and reopens the connection.
+
+        Only renames files, so it is quick enough for the main thread.
+        """
+        self.conn.close()
+        try:
+            # Closing the last connection checkpoints the WAL; frames left over
+            # would be replayed onto the new file
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
+            os.replace(restore_path, self.db_path)
+        finally:
+            self._transaction_depth = 0
+            self.conn = self._connect()
+        self.create_tables()
+        self._topics.clear()
+        self._reload_settings()
+        self.generation += 1
+
+    def export_database(self, target_path, password=None, progress=None):
+        """Writes a consistent, compacted copy of the database to target_path, optionally encrypted.
 
-    def export_database(self, target_path, password=None):
-        """Copies the current database to a target path, optionally encrypted."""
-        import shutil
-        import os
+        Synchronous wrapper around export_backup; returns True, an error code
+        or False.
+        """
         try:
             self.conn.commit()
-            if not password:
-                shutil.copy2(DB_PATH, target_path)
-                return True
-            
-            # Encrypt
-            try:
-                from cryptography.fernet import Fernet
-            except ImportError:
-                return "CRYPTO_MISSING"
-
-            salt = os.urandom(16)
-            key = self._derive_key(password, salt)
-            fernet = Fernet(key)
-            
-            with open(DB_PATH, 'rb') as f:
-                data = f.read()
-            
-            encrypted_data = fernet.encrypt(data)
-            
-            with open(target_path, 'wb') as f:
-                f.write(salt + encrypted_data)
-            return True
+            return export_backup(self.db_path, target_path, password, progress)
         except Exception as e:
             print(f"Error exporting database: {e}")
             return False
 
-    def import_database(self, source_path, password=None):
-        """Replaces the current database with a new one, optionally decrypted."""
-        import sqlite3
+    def export_snapshot(self, backup_dir, keep_last=DEFAULT_KEEP_LAST,
+                        keep_daily=DEFAULT_KEEP_DAILY, progress=None):
+        """Synchronous wrapper around export_snapshot; returns its result or False."""
         try:
-            with open(source_path, 'rb') as f:
-                content = f.read()
-            
-            # SQLite files start with "SQLite format 3\000"
-            is_sqlite = content.startswith(b"SQLite format 3\000")
-            
-            final_data = None
-            if not is_sqlite:
-                if not password:
-                    return "PASSWORD_REQUIRED"
-                
-                try:
-                    from cryptography.fernet import Fernet
-                except ImportError:
-                    return "CRYPTO_MISSING"
-
-                try:
-                    salt = content[:16]
-                    encrypted_data = content[16:]
-                    key = self._derive_key(password, salt)
-                    fernet = Fernet(key)
-                    final_data = fernet.decrypt(encrypted_data)
-                except Exception:
-                    return "INVALID_PASSWORD"
-            else:
-                final_data = content
+            self.conn.commit()
+            return export_snapshot(self.db_path, backup_dir, keep_last, keep_daily, progress)
+        except Exception as e:
+            print(f"Error creating snapshot: {e}")
+            return False
+
+    def import_database(self, source_path, password=None, progress=None):
+        """Replaces the current database with a backup, decrypting it first if needed.
 
-            self.conn.close()
-            with open(DB_PATH, 'wb') as f:
-                f.write(final_data)
-            self.conn = sqlite3.connect(DB_PATH)
+        Accepts plain SQLite files, chunked containers, the older single-token
+        Fernet exports and incremental snapshot manifests.
+        """
+        try:
+            result, plain_path = stage_import(source_path, password, progress)
+            if result is not True:
+                return result
+            try:
+                self.restore_file(plain_path, progress)
+            finally:
+                if plain_path != source_path:
+                    os.remove(plain_path)
             return True
         except Exception as e:
             print(f"Error importing database: {e}")
-            try:
-                self.conn = sqlite3.connect(DB_PATH)
-            except:
-                pass
             return False
 
     def close(self):
@@ -0,0 +1,161 @@
+import csv
+import os
+from datetime import datetime
+from .database import DatabaseManager, split_tags
+from .models import RevisionLogic
+from .utils import ui_to_db_date
+
+DEFAULT_AREA_COLOR = "#999999"
+DEFAULT_TAG_COLOR = "#555555"
+
+# Topics written per transaction. Bounds memory and the work lost to a failure.
+CHUNK_SIZE = 1000
+
+# How often (in rows) progress is reported while reading the file
+PROGRESS_EVERY = 200
+
+class ImportCancelled(Exception):
+    """The user cancelled the import. Chunks committed before that are kept."""
+
+class ImportChunkError(Exception):
+    """A chunk failed to commit. Every chunk before it is already in the database."""
+    def __init__(self, chunk_number, first_line, last_line, imported, cause):
+        super().__init__(
+            f"Falha no bloco {chunk_number} (linhas {first_line}-{last_line}): {cause}. "
+            f"{imported} tópicos de blocos anteriores foram mantidos."
+        )
+        self.chunk_number = chunk_number
+        self.first_line = first_line
+        self.last_line = last_line
+        self.imported = imported
+        self.cause = cause
+
+class BulkImporter:
+    """Imports topics from a CSV file (nome_topico, area, data_inicio, tag, descricao).
+
+    Meant to run on a worker thread: it opens its own DatabaseManager on
+    db_path and streams the file, committing every CHUNK_SIZE topics in their
+    own transaction, so memory stays flat whatever the file size. Areas and
+    tags are resolved with one query each up front. log(message) and
+    progress(fraction) are called from the worker thread, progress being the
+    byte offset reached in the file; is_cancelled() is polled between rows.
+    """
+    def __init__(self, db_path, log=None, progress=None, is_cancelled=None, chunk_size=CHUNK_SIZE):
+        self.db_path = db_path
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda fraction: None)
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.chunk_size = chunk_size
+        self.imported = 0
+
+    def run(self, csv_path):
+        """Imports csv_path and returns the number of topics added."""
+        self.imported = 0
+        total_bytes = os.path.getsize(csv_path) or 1
+
+        db = DatabaseManager(self.db_path)
+        try:
+            logic = RevisionLogic(db)
+            self.known_areas = set(db.get_area_ids_by_name())
+            self.known_tags = set(db.get_tag_ids_by_name())
+
+            chunk = []
+            chunk_number = 1
+            first_line = None
+            for index, (row, line_num, offset) in enumerate(self._read_rows(csv_path)):
+                self._check_cancelled()
+                # Header check (simple heuristic, skip if matches our keys)
+                if index == 0 and row and "nome_topico" in row[0].lower():
+                    continue
+
+                topic = self._parse_row(row)
+                if topic:
+                    if first_line is None:
+                        first_line = line_num
+                    chunk.append(topic)
+
+                if len(chunk) >= self.chunk_size:
+                    self._write_chunk(logic, chunk, chunk_number, first_line, line_num)
+                    chunk = []
+                    chunk_number += 1
+                    first_line = None
+                    self.progress(offset / total_bytes)
+                elif index % PROGRESS_EVERY == 0:
+                    self.progress(offset / total_bytes)
+
+            if chunk:
+                self._check_cancelled()
+                self._write_chunk(logic, chunk, chunk_number, first_line, line_num)
+        finally:
+            db.close()
+
+        self.progress(1.0)
+        return self.imported
+
+    def _read_rows(self, csv_path):
+        """Yields (row, line number, byte offset) one row at a time."""
+        offset = 0
+        with open(csv_path, 'rb') as raw:
+            def lines():
+                nonlocal offset
+                for line in raw:
+                    offset += len(line)
+                    yield line.decode('utf-8')
+
+            reader = csv.reader(lines())
+            for row in reader:
+                yield row, reader.line_num, offset
+
+    def _check_cancelled(self):
+        if self.is_cancelled():
+            raise ImportCancelled()
+
+    def _parse_row(self, row):
+        if not row or len(row) < 3:
+            self.log(f"Linha ignorada (inválida): {row}")
+            return None
+
+        title = row[0].strip()
+        area_name = row[1].strip()
+        start_date_raw = row[2].strip()
+        tag_name = row[3].strip() if len(row) > 3 else ""
+        desc = row[4].strip() if len(row) > 4 else ""
+
+        if not title or not area_name or not start_date_raw:
+            self.log(f"Linha ignorada (dados faltantes): {title}")
+            return None
+
+        start_date_iso = ui_to_db_date(start_date_raw)
+        try:
+            datetime.strptime(start_date_iso, '%Y-%m-%d')
+        except ValueError:
+            start_date_iso = datetime.now().strftime('%Y-%m-%d')
+            self.log(f"Data inválida para {title}, usando hoje.")
+
+        return (title, area_name, start_date_iso, tag_name, None, desc)
+
+    def _write_chunk(self, logic, topics, chunk_number, first_line, last_line):
+        db = logic.db
+        new_areas = list(dict.fromkeys(t[1] for t in topics if t[1] not in self.known_areas))
+        # The tag column may hold several comma-separated tags, as everywhere else
+        new_tags = list(dict.fromkeys(name for t in topics for name in split_tags(t[3])
+                                      if name not in self.known_tags))
+
+        try:
+            with db.transaction():
+                if new_areas:
+                    db.add_areas_many([(name, DEFAULT_AREA_COLOR) for name in new_areas])
+                if new_tags:
+                    db.add_managed_tags_many([(name, DEFAULT_TAG_COLOR) for name in new_tags])
+                logic.create_topics_with_revisions_many(topics)
+        except Exception as e:
+            raise ImportChunkError(chunk_number, first_line, last_line, self.imported, e) from e
+
+        # Only trust the new names once they are committed
+        self.known_areas.update(new_areas)
+        self.known_tags.update(new_tags)
+        for name in new_areas:
+            self.log(f"Nova área criada: {name}")
+        for name in new_tags:
+            self.log(f"Nova tag criada: {name}")
+        self.imported += len(topics)
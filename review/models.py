@@ -1,77 +1,102 @@
+import calendar
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from .database import DatabaseManager
+from .records import Revision
+
+# Months of revisions kept in memory: the shown one, its neighbours and a few recent ones
+MONTH_CACHE_SIZE = 6
 
 class RevisionLogic:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db=None):
+        # The application owns a single RevisionLogic/DatabaseManager and
+        # injects it into every view and dialog; standalone scripts get their own.
+        self.db = db if db is not None else DatabaseManager()
+        # (year, month) -> revisions by date, least recently used first
+        self._month_cache = OrderedDict()
+        # (generation, data_version) the cached months were read at
+        self._month_cache_stamp = None
 
     def create_topic_with_revisions(self, title, area, start_date_str, tags, color, description=""):
         """Creates a topic. Revisions are scheduled only after first study session."""
         if not tags:
             tags = "Estudo"
             
-        topic_id = self.db.add_topic(title, area, start_date_str, tags, color, description)
-        
-        # Schedule the "0-day" revision (The initial study)
-        self.db.add_revision(topic_id, start_date_str, 0)
+        with self.db.transaction():
+            topic_id = self.db.add_topic(title, area, start_date_str, tags, color, description)
+            
+            # Schedule the "0-day" revision (The initial study)
+            self.db.add_revision(topic_id, start_date_str, 0)
             
         return topic_id
 
+    def create_topics_with_revisions_many(self, topics):
+        """Bulk create_topic_with_revisions for (title, area, start_date, tags, color, description) rows."""
+        rows = [(title, area, start_date, tags or "Estudo", color, description)
+                for title, area, start_date, tags, color, description in topics]
+        with self.db.transaction():
+            topic_ids = self.db.add_topics_many(rows)
+            self.db.add_revisions_many([(topic_id, row[2], 0) for topic_id, row in zip(topic_ids, rows)])
+        return topic_ids
+
     def register_study_session(self, topic_id, duration_seconds):
         """Records study time and marks today's revision as studied."""
-        self.db.update_time_spent(topic_id, duration_seconds)
-        
-        # Check if there is a pending revision for TODAY (or overdue) to mark as studied
-        today_str = datetime.now().strftime('%Y-%m-%d')
-        revisions = self.db.get_revisions_for_topic(topic_id)
-        
-        target_rev_id = None
-        for rev in revisions:
-            # rev: (id, topic_id, scheduled_date, status, interval_days, ...)
-            rev_date = rev[2]
-            status = rev[3]
-            if status == 'pending' and rev_date <= today_str:
-                target_rev_id = rev[0]
-                break
-        
-        if target_rev_id:
-            self.mark_as_studied(target_rev_id)
+        with self.db.transaction():
+            self.db.update_time_spent(topic_id, duration_seconds)
+            
+            # Check if there is a pending revision for TODAY (or overdue) to mark as studied
+            today_str = datetime.now().strftime('%Y-%m-%d')
+            revisions = self.db.get_revisions_for_topic(topic_id)
+            
+            target_rev_id = None
+            for rev in revisions:
+                if rev.status == 'pending' and rev.scheduled_date <= today_str:
+                    target_rev_id = rev.id
+                    break
+            
+            if target_rev_id:
+                self.mark_as_studied(target_rev_id)
 
     def mark_as_studied(self, revision_id):
         """Marks a revision as studied. Creates new cycle if interval is 0 or 30."""
-        self.db.update_revision_status(revision_id, 'studied')
-        
-        # Check interval to see if we need to create/restart cycle
-        cursor = self.db.conn.cursor()
-        cursor.execute("SELECT interval_days, topic_id, scheduled_date FROM revisions WHERE id = ?", (revision_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            interval, topic_id, scheduled_date = row
+        with self.db.transaction():
+            self.db.update_revision_status(revision_id, 'studied')
             
-            # Create cycle on first study (interval 0) OR on 30-day completion
-            if interval == 0 or interval == 30:
-                start_date = datetime.strptime(scheduled_date, '%Y-%m-%d')
-                intervals = [7, 15, 30]
-                
-                # Check setting
-                skip_weekends = self.db.get_setting('skip_weekends', 'False') == 'True'
-                
-                # Check existing revisions to avoid duplicates
-                cursor.execute("SELECT interval_days FROM revisions WHERE topic_id = ?", (topic_id,))
-                existing_intervals = {r[0] for r in cursor.fetchall()}
+            # Check interval to see if we need to create/restart cycle
+            cursor = self.db.conn.cursor()
+            cursor.execute("SELECT interval_days, topic_id, scheduled_date FROM revisions WHERE id = ?", (revision_id,))
+            row = cursor.fetchone()
+            
+            if row:
+                interval, topic_id, scheduled_date = row
                 
-                for new_interval in intervals:
-                    if new_interval not in existing_intervals:
-                        rev_date_obj = start_date + timedelta(days=new_interval)
-                        
-                        if skip_weekends:
-                            # If it falls on Sat (5) or Sun (6), move to Monday
-                            while rev_date_obj.weekday() >= 5:
-                                rev_date_obj += timedelta(days=1)
-                        
-                        rev_date = rev_date_obj.strftime('%Y-%m-%d')
-                        self.db.add_revision(topic_id, rev_date, new_interval)
+                # Create cycle on first study (interval 0) OR on 30-day completion
+                if interval == 0 or interval == 30:
+                    start_date = datetime.strptime(scheduled_date, '%Y-%m-%d')
+                    intervals = [7, 15, 30]
+                    
+                    # Check setting
+                    skip_weekends = self.db.get_setting('skip_weekends')
+                    
+                    # Check existing revisions to avoid duplicates
+                    cursor.execute("SELECT interval_days FROM revisions WHERE topic_id = ?", (topic_id,))
+                    existing_intervals = {r[0] for r in cursor.fetchall()}
+                    
+                    new_revisions = []
+                    for new_interval in intervals:
+                        if new_interval not in existing_intervals:
+                            rev_date_obj = start_date + timedelta(days=new_interval)
+                            
+                            if skip_weekends:
+                                # If it falls on Sat (5) or Sun (6), move to Monday
+                                while rev_date_obj.weekday() >= 5:
+                                    rev_date_obj += timedelta(days=1)
+                            
+                            rev_date = rev_date_obj.strftime('%Y-%m-%d')
+                            new_revisions.append((topic_id, rev_date, new_interval))
+                    
+                    if new_revisions:
+                        self.db.add_revisions_many(new_revisions)
 
     def mark_as_pending(self, revision_id):
         """Reverts a revision status to pending."""
@@ -86,19 +111,18 @@ class RevisionLogic:
         revisions = self.db.get_revisions_for_topic(topic_id)
         
         # Check setting
-        skip_weekends = self.db.get_setting('skip_weekends', 'False') == 'True'
+        skip_weekends = self.db.get_setting('skip_weekends')
         
         # 2. Find target revision and shift it + all following ones
         found_target = False
+        shifted = []
         for rev in revisions:
-            rev_id, t_id, scheduled_date_str, status, interval = rev
-            
-            if rev_id == revision_id:
+            if rev.id == revision_id:
                 found_target = True
                 
             if found_target:
                 # Calculate new date (+1 day)
-                current_date = datetime.strptime(scheduled_date_str, '%Y-%m-%d')
+                current_date = datetime.strptime(rev.scheduled_date, '%Y-%m-%d')
                 new_date_obj = current_date + timedelta(days=1)
                 
                 if skip_weekends:
@@ -107,11 +131,13 @@ class RevisionLogic:
                         new_date_obj += timedelta(days=1)
                 
                 new_date = new_date_obj.strftime('%Y-%m-%d')
-                self.db.update_revision_date(rev_id, new_date)
-                
-                # Re-marking as pending for the new date
-                if rev_id == revision_id:
-                    self.db.update_revision_status(rev_id, 'pending')
+                shifted.append((rev.id, new_date))
+        
+        # 3. Apply all shifts and re-mark the target as pending in one commit
+        if shifted:
+            with self.db.transaction():
+                self.db.update_revision_dates_many(shifted)
+                self.db.update_revision_status(revision_id, 'pending')
 
     def get_upcoming_revisions(self, date_str=None):
         """Returns revisions scheduled for a specific date (defaults to today)."""
@@ -120,14 +146,57 @@ class RevisionLogic:
             
         cursor = self.db.conn.cursor()
         cursor.execute('''
-            SELECT r.id, r.topic_id, r.scheduled_date, r.status, r.interval_days, t.title, t.area, COALESCE(a.color, t.color)
+            SELECT r.id, r.topic_id, r.scheduled_date, r.status, r.interval_days, t.title, COALESCE(a.name, ''), COALESCE(a.color, t.color)
             FROM revisions r
             JOIN topics t ON r.topic_id = t.id
-            LEFT JOIN areas a ON t.area = a.name
+            LEFT JOIN areas a ON a.id = t.area_id
             WHERE r.scheduled_date = ?
             ORDER BY t.title
         ''', (date_str,))
-        return cursor.fetchall()
+        return [Revision(*row) for row in cursor.fetchall()]
+
+    def get_revisions_between(self, start_date_str, end_date_str):
+        """Returns revisions scheduled in [start, end], grouped by date, from a single query."""
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+            SELECT r.id, r.topic_id, r.scheduled_date, r.status, r.interval_days, t.title, COALESCE(a.name, ''), COALESCE(a.color, t.color)
+            FROM revisions r
+            JOIN topics t ON r.topic_id = t.id
+            LEFT JOIN areas a ON a.id = t.area_id
+            WHERE r.scheduled_date BETWEEN ? AND ?
+            ORDER BY r.scheduled_date, t.title
+        ''', (start_date_str, end_date_str))
+        
+        by_date = {}
+        for row in cursor.fetchall():
+            rev = Revision(*row)
+            by_date.setdefault(rev.scheduled_date, []).append(rev)
+        return by_date
+
+    def get_month_revisions(self, year, month):
+        """Returns get_revisions_between for a whole month, from an LRU cache dropped on every commit.
+
+        Commits from other connections count too. The result is shared with
+        later callers and must not be modified.
+        """
+        stamp = (self.db.generation, self.db.get_data_version())
+        if stamp != self._month_cache_stamp:
+            self._month_cache.clear()
+            self._month_cache_stamp = stamp
+        key = (year, month)
+        if key in self._month_cache:
+            self._month_cache.move_to_end(key)
+            return self._month_cache[key]
+        last_day = calendar.monthrange(year, month)[1]
+        by_date = self.get_revisions_between(f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day:02d}")
+        self._month_cache[key] = by_date
+        if len(self._month_cache) > MONTH_CACHE_SIZE:
+            self._month_cache.popitem(last=False)
+        return by_date
+
+    def clear_month_cache(self):
+        """Forgets the cached months, so the next reads go to the database."""
+        self._month_cache.clear()
 
     def get_today_stats(self):
         """Returns statistics for the current day."""
@@ -135,8 +204,8 @@ class RevisionLogic:
         
         # Pending topics
         revisions = self.get_upcoming_revisions(today)
-        pending_count = sum(1 for rev in revisions if rev[3] == 'pending')
-        completed_count = sum(1 for rev in revisions if rev[3] == 'studied')
+        pending_count = sum(1 for rev in revisions if rev.status == 'pending')
+        completed_count = sum(1 for rev in revisions if rev.status == 'studied')
         
         # Total study time today
         duration_seconds = self.db.get_study_time_for_date(today)
@@ -154,4 +223,3 @@ class RevisionLogic:
         row = cursor.fetchone()
         if row:
             self.db.update_revision_date(row[0], new_start_date_str)
-        self.db.conn.commit()
@@ -0,0 +1,47 @@
+class _Record:
+    """Base for the row types: fixed attributes, filled positionally in column order."""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        self.assign(*values)
+
+    def assign(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Topic(_Record):
+    """A topic, plus its area's color and the date of its next pending revision as of loading."""
+    __slots__ = ('id', 'title', 'area', 'start_date', 'tags', 'color', 'description',
+                 'time_spent', 'area_color', 'next_revision_date', 'area_id')
+
+    def __init__(self, id, title, area, start_date, tags=None, color=None, description=None,
+                 time_spent=0, area_color=None, next_revision_date=None, area_id=None):
+        self.assign(id, title, area, start_date, tags, color, description, time_spent or 0,
+                    area_color, next_revision_date, area_id)
+
+    @property
+    def display_color(self):
+        # The area's color wins over the topic's own
+        return self.area_color or self.color
+
+class Revision(_Record):
+    """A scheduled revision; title, area and color come from its topic when joined."""
+    __slots__ = ('id', 'topic_id', 'scheduled_date', 'status', 'interval_days',
+                 'title', 'area', 'color')
+
+    def __init__(self, id, topic_id, scheduled_date, status, interval_days,
+                 title=None, area=None, color=None):
+        self.assign(id, topic_id, scheduled_date, status, interval_days, title, area, color)
+
+class Area(_Record):
+    __slots__ = ('id', 'name', 'color')
+
+class Tag(_Record):
+    __slots__ = ('id', 'name', 'color')
+
+class Session(_Record):
+    __slots__ = ('id', 'topic_id', 'duration_seconds', 'session_date')
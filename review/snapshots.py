@@ -0,0 +1,164 @@
+import os
+import json
+import zlib
+import hashlib
+from datetime import datetime
+
+# Incremental backups. A snapshot directory holds content-addressed blocks and
+# one manifest per snapshot:
+#
+#   <root>/blocks/<ab>/<sha256>     zlib-compressed block
+#   <root>/manifests/<id>.json      ordered list of block hashes
+#
+# Blocks are a whole number of SQLite pages, so a snapshot only writes the
+# blocks whose pages changed since any snapshot still on disk.
+MANIFEST_FORMAT = "review-snapshot"
+MANIFEST_VERSION = 1
+BLOCK_SIZE = 64 * 1024
+DEFAULT_KEEP_LAST = 7
+DEFAULT_KEEP_DAILY = 30
+
+class SnapshotCorrupted(Exception):
+    """A manifest is unreadable or one of its blocks is missing or damaged."""
+
+def is_manifest(path):
+    with open(path, 'rb') as f:
+        if f.read(1) != b'{':
+            return False
+    try:
+        return _read_manifest(path)['format'] == MANIFEST_FORMAT
+    except (SnapshotCorrupted, KeyError):
+        return False
+
+def _read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotCorrupted(f"Unreadable manifest {path}: {e}")
+
+def _write_atomic(path, data):
+    partial_path = path + '.part'
+    with open(partial_path, 'wb') as f:
+        f.write(data)
+    os.replace(partial_path, path)
+
+class SnapshotStore:
+    """Content-addressed block store with one manifest per snapshot."""
+    def __init__(self, root):
+        self.root = root
+        self.blocks_dir = os.path.join(root, 'blocks')
+        self.manifests_dir = os.path.join(root, 'manifests')
+
+    @classmethod
+    def for_manifest(cls, manifest_path):
+        return cls(os.path.dirname(os.path.dirname(os.path.abspath(manifest_path))))
+
+    def _block_path(self, digest):
+        return os.path.join(self.blocks_dir, digest[:2], digest)
+
+    def manifest_path(self, snapshot_id):
+        return os.path.join(self.manifests_dir, f"{snapshot_id}.json")
+
+    def add(self, plain_path, progress=None):
+        """Stores plain_path as a new snapshot. Returns (snapshot_id, blocks_written)."""
+        report = progress or (lambda stage, fraction: None)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        total = os.path.getsize(plain_path) or 1
+        digests = []
+        written = 0
+        with open(plain_path, 'rb') as f:
+            while True:
+                block = f.read(BLOCK_SIZE)
+                if not block:
+                    break
+                digest = hashlib.sha256(block).hexdigest()
+                path = self._block_path(digest)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    _write_atomic(path, zlib.compress(block, 1))
+                    written += 1
+                digests.append(digest)
+                report('write', f.tell() / total)
+
+        # The manifest goes last: a snapshot exists only once all its blocks do
+        created = datetime.now()
+        snapshot_id = created.strftime("%Y%m%d-%H%M%S-%f")
+        manifest = {
+            'format': MANIFEST_FORMAT,
+            'version': MANIFEST_VERSION,
+            'created': created.isoformat(timespec='seconds'),
+            'size': os.path.getsize(plain_path),
+            'block_size': BLOCK_SIZE,
+            'blocks': digests,
+        }
+        _write_atomic(self.manifest_path(snapshot_id), json.dumps(manifest).encode('utf-8'))
+        return snapshot_id, written
+
+    def list_snapshots(self):
+        """Returns (snapshot_id, manifest) pairs, newest first."""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        snapshots = []
+        for name in sorted(os.listdir(self.manifests_dir), reverse=True):
+            if name.endswith('.json'):
+                snapshots.append((name[:-len('.json')], _read_manifest(os.path.join(self.manifests_dir, name))))
+        return snapshots
+
+    def restore(self, manifest_path, target_path, progress=None):
+        """Reassembles the snapshot described by manifest_path into target_path."""
+        report = progress or (lambda stage, fraction: None)
+        manifest = _read_manifest(manifest_path)
+        if manifest.get('format') != MANIFEST_FORMAT or manifest.get('version') != MANIFEST_VERSION:
+            raise SnapshotCorrupted(f"Unsupported manifest {manifest_path}")
+        digests = manifest['blocks']
+        with open(target_path, 'wb') as out:
+            for i, digest in enumerate(digests, 1):
+                try:
+                    with open(self._block_path(digest), 'rb') as f:
+                        block = zlib.decompress(f.read())
+                except (OSError, zlib.error) as e:
+                    raise SnapshotCorrupted(f"Block {digest} is unreadable: {e}")
+                if hashlib.sha256(block).hexdigest() != digest:
+                    raise SnapshotCorrupted(f"Block {digest} is damaged")
+                out.write(block)
+                report('read', i / len(digests))
+        if os.path.getsize(target_path) != manifest['size']:
+            raise SnapshotCorrupted(f"Snapshot {manifest_path} is incomplete")
+
+    def prune(self, keep_last=DEFAULT_KEEP_LAST, keep_daily=DEFAULT_KEEP_DAILY):
+        """Applies the retention policy and drops blocks no snapshot uses any more.
+
+        Keeps the keep_last newest snapshots plus the newest snapshot of each of
+        the keep_daily most recent days. Returns the ids that were removed.
+        """
+        kept_days = set()
+        removed = []
+        for index, (snapshot_id, manifest) in enumerate(self.list_snapshots()):
+            day = manifest['created'][:10]
+            if index < keep_last:
+                kept_days.add(day)
+            elif day not in kept_days and len(kept_days) < keep_daily:
+                kept_days.add(day)
+            else:
+                os.remove(self.manifest_path(snapshot_id))
+                removed.append(snapshot_id)
+        if removed:
+            self.collect_garbage()
+        return removed
+
+    def collect_garbage(self):
+        """Deletes blocks that no manifest references. Returns how many were deleted."""
+        referenced = set()
+        for snapshot_id, manifest in self.list_snapshots():
+            referenced.update(manifest['blocks'])
+        deleted = 0
+        if not os.path.isdir(self.blocks_dir):
+            return deleted
+        for prefix in os.listdir(self.blocks_dir):
+            prefix_dir = os.path.join(self.blocks_dir, prefix)
+            for name in os.listdir(prefix_dir):
+                if name not in referenced:
+                    os.remove(os.path.join(prefix_dir, name))
+                    deleted += 1
+        return deleted
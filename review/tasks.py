@@ -0,0 +1,56 @@
+import threading
+from gi.repository import GLib
+
+class BackgroundTask:
+    """Runs a function on a worker thread and reports back on the GTK main loop.
+
+    The worker function receives the task and may call report_progress() and
+    poll is_cancelled() at safe points. on_progress, on_done, on_error and
+    on_cancelled are always invoked on the main thread through GLib.idle_add.
+    A worker that raises after cancel() was requested ends in on_cancelled
+    instead of on_error.
+    """
+    def __init__(self, func, on_progress=None, on_done=None, on_error=None, on_cancelled=None):
+        self.func = func
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+        self._cancel_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def report_progress(self, *args):
+        if self.on_progress:
+            GLib.idle_add(self._dispatch, self.on_progress, args)
+
+    def _run(self):
+        try:
+            result = self.func(self)
+        except Exception as e:
+            if self.is_cancelled():
+                self._finish(self.on_cancelled)
+            else:
+                self._finish(self.on_error, e)
+        else:
+            self._finish(self.on_done, result)
+
+    def _finish(self, callback, *args):
+        if callback:
+            GLib.idle_add(self._dispatch, callback, args)
+
+    def _dispatch(self, callback, args):
+        callback(*args)
+        return False
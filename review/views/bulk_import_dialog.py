@@ -1,7 +1,6 @@
 from gi.repository import Gtk, Adw, Gio, GLib
-import csv
-from datetime import datetime
-from ..utils import ui_to_db_date
+from ..importer import BulkImporter
+from ..tasks import BackgroundTask
 
 class BulkImportDialog(Adw.Window):
     def __init__(self, logic, refresh_callback, **kwargs):
@@ -22,7 +21,7 @@ class BulkImportDialog(Adw.Window):
         main_box.append(header)
         
         self.cancel_btn = Gtk.Button(label="Cancelar")
-        self.cancel_btn.connect("clicked", lambda x: self.destroy())
+        self.cancel_btn.connect("clicked", self.on_cancel_clicked)
         header.pack_start(self.cancel_btn)
         
         content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=16)
@@ -79,6 +78,31 @@ class BulkImportDialog(Adw.Window):
         content_box.append(self.import_btn)
         
         self.selected_file = None
+        self.task = None
+        self.importer = None
+        self.closed = False
+        self.connect("close-request", self.on_close_request)
+
+    def on_cancel_clicked(self, btn):
+        if self.task and self.task.is_running():
+            # Stop the worker; the chunk in progress is rolled back
+            self.task.cancel()
+            self.cancel_btn.set_sensitive(False)
+            self.log_status("Cancelando importação...")
+        else:
+            self.destroy()
+
+    def on_close_request(self, window):
+        self.closed = True
+        if self.task and self.task.is_running():
+            # Nothing left to update once the dialog is gone, but a commit that
+            # already landed still has to reach the views
+            self.task.cancel()
+            self.task.on_progress = None
+            self.task.on_error = None
+            self.task.on_cancelled = lambda: self.refresh_callback() if self.refresh_callback else None
+            self.task.on_done = lambda count: self.refresh_callback() if self.refresh_callback else None
+        return False
 
     def on_file_clicked(self, btn):
         dialog = Gtk.FileDialog()
@@ -113,85 +137,55 @@ class BulkImportDialog(Adw.Window):
             return
             
         self.import_btn.set_sensitive(False)
-        self.cancel_btn.set_sensitive(False)
+        self.file_btn.set_sensitive(False)
         self.progress.set_visible(True)
         self.progress.set_fraction(0.0)
         
-        # Run import in idle/timeout to not block UI completely (simulated async)
-        GLib.timeout_add(100, self.process_import)
+        # The worker writes through its own connection, never the UI's
+        self.importer = importer = BulkImporter(
+            self.logic.db.db_path,
+            log=lambda message: GLib.idle_add(self._log_from_worker, message),
+        )
+        self.task = BackgroundTask(
+            lambda task: importer.run(self.selected_file),
+            on_progress=self.on_import_progress,
+            on_done=self.on_import_done,
+            on_error=self.on_import_error,
+            on_cancelled=self.on_import_cancelled,
+        )
+        importer.progress = self.task.report_progress
+        importer.is_cancelled = self.task.is_cancelled
+        self.task.start()
 
-    def process_import(self):
-        try:
-            with open(self.selected_file, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                rows = list(reader)
-                total = len(rows)
-                
-                # Header check (simple heuristic, skip if matches our keys)
-                if total > 0 and "nome_topico" in rows[0][0].lower():
-                    rows = rows[1:]
-                    total -= 1
-                
-                count = 0
-                for row in rows:
-                    if not row or len(row) < 3:
-                        self.log_status(f"Linha ignorada (inválida): {row}")
-                        continue
-                        
-                    title = row[0].strip()
-                    area_name = row[1].strip()
-                    start_date_raw = row[2].strip()
-                    tag_name = row[3].strip() if len(row) > 3 else ""
-                    desc = row[4].strip() if len(row) > 4 else ""
-                    
-                    if not title or not area_name or not start_date_raw:
-                         self.log_status(f"Linha ignorada (dados faltantes): {title}")
-                         continue
+    def _log_from_worker(self, message):
+        if not self.closed:
+            self.log_status(message)
+        return False
 
-                    # Process Area
-                    area = self.logic.db.get_area_by_name(area_name)
-                    if not area:
-                        self.logic.db.add_area(area_name, "#999999") # Default gray
-                        self.log_status(f"Nova área criada: {area_name}")
-                    
-                    # Process Tag
-                    if tag_name:
-                         tag = self.logic.db.get_tag_by_name(tag_name)
-                         if not tag:
-                             self.logic.db.add_managed_tag(tag_name, "#555555")
-                             self.log_status(f"Nova tag criada: {tag_name}")
-                    
-                    # Process Date
-                    try:
-                        start_date_iso = ui_to_db_date(start_date_raw)
-                        # Basic validation
-                        try:
-                            datetime.strptime(start_date_iso, '%Y-%m-%d')
-                        except ValueError:
-                             start_date_iso = datetime.now().strftime('%Y-%m-%d')
-                             self.log_status(f"Data inválida para {title}, usando hoje.")
-                    except:
-                        start_date_iso = datetime.now().strftime('%Y-%m-%d')
+    def on_import_progress(self, fraction):
+        self.progress.set_fraction(fraction)
 
-                    # Add Topic
-                    self.logic.create_topic_with_revisions(
-                        title, area_name, start_date_iso, tag_name, None, desc
-                    )
-                    
-                    count += 1
-                    self.progress.set_fraction(count / total)
-                    while GLib.MainContext.default().pending():
-                        GLib.MainContext.default().iteration(False)
-                        
-            self.log_status(f"Importação concluída! {count} tópicos adicionados.")
-            self.progress.set_fraction(1.0)
-            
-            if self.refresh_callback:
-                self.refresh_callback()
-                
-        except Exception as e:
-             self.log_status(f"Erro fatal na importação: {e}")
-             
+    def on_import_done(self, count):
+        self.log_status(f"Importação concluída! {count} tópicos adicionados.")
+        self.progress.set_fraction(1.0)
+        self._finish_import()
+        if self.refresh_callback:
+            self.refresh_callback()
+
+    def on_import_error(self, error):
+        self.log_status(f"Erro fatal na importação: {error}")
+        self._finish_import()
+        if self.importer.imported and self.refresh_callback:
+            self.refresh_callback()
+
+    def on_import_cancelled(self):
+        # Chunks committed before the cancel are kept
+        self.log_status(f"Importação cancelada. {self.importer.imported} tópicos foram adicionados.")
+        self._finish_import()
+        if self.importer.imported and self.refresh_callback:
+            self.refresh_callback()
+
+    def _finish_import(self):
+        self.task = None
         self.cancel_btn.set_sensitive(True)
         self.cancel_btn.set_label("Fechar")
-        return False # Stop timeout
@@ -0,0 +1,72 @@
+from gi.repository import Gtk, Gdk
+
+# Prefix of the generated classes; "color-dot" in style.css only sets the shape
+CLASS_PREFIX = "tint-"
+
+class ColorClasses:
+    """One display-wide stylesheet with a CSS class per distinct color.
+
+    Widgets add the class for their color instead of carrying their own
+    Gtk.CssProvider. The sheet is regenerated only when a color it has not
+    seen yet shows up, e.g. after an area or tag is created or edited.
+    """
+    def __init__(self):
+        # Color as stored -> class name, or None when it doesn't parse
+        self._classes = {}
+        # Class name -> CSS rule
+        self._rules = {}
+        self._provider = None
+        self._dirty = False
+
+    def _register(self, color):
+        if color in self._classes:
+            return self._classes[color]
+        css_class = None
+        rgba = Gdk.RGBA()
+        if isinstance(color, str) and rgba.parse(color.strip()):
+            # The rule is rebuilt from the parsed channels, never from the raw string
+            channels = (rgba.red, rgba.green, rgba.blue, rgba.alpha)
+            css_class = CLASS_PREFIX + "".join(f"{round(c * 255):02x}" for c in channels)
+            if css_class not in self._rules:
+                self._rules[css_class] = f".{css_class} {{ background-color: {rgba.to_string()}; }}"
+                self._dirty = True
+        self._classes[color] = css_class
+        return css_class
+
+    def _regenerate(self):
+        if not self._dirty:
+            return
+        if self._provider is None:
+            self._provider = Gtk.CssProvider()
+            Gtk.StyleContext.add_provider_for_display(
+                Gdk.Display.get_default(),
+                self._provider,
+                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+            )
+        self._provider.load_from_data("\n".join(self._rules.values()).encode())
+        self._dirty = False
+
+    def register(self, colors):
+        """Adds classes for a batch of colors, such as every area and tag, with one regeneration."""
+        for color in colors:
+            self._register(color)
+        self._regenerate()
+
+    def class_for(self, color):
+        """Returns the class painting color, or None for empty or invalid colors."""
+        css_class = self._register(color)
+        self._regenerate()
+        return css_class
+
+    def apply(self, widget, color):
+        """Gives widget the class for color, replacing any previous one; returns False if color is invalid."""
+        css_class = self.class_for(color)
+        for existing in widget.get_css_classes():
+            if existing.startswith(CLASS_PREFIX) and existing != css_class:
+                widget.remove_css_class(existing)
+        if css_class:
+            widget.add_css_class(css_class)
+        return css_class is not None
+
+# Shared by every view
+color_classes = ColorClasses()
@@ -1,5 +1,6 @@
 from gi.repository import Gtk, Adw, GObject, Gdk
 from ..utils import db_to_ui_date
+from .colors import color_classes
 
 class DailyRevisionsDialog(Adw.Window):
     def __init__(self, date_str, revisions, logic, refresh_callback, edit_callback, **kwargs):
@@ -41,50 +42,34 @@ class DailyRevisionsDialog(Adw.Window):
         
         for rev in revisions:
             # Same logic as Popover but for all items
-            # rev: (id, topic_id, scheduled_date, status, interval_days, title, area, color)
-            rev_id, topic_id, _, status, interval, title, area, _ = rev
             
-            row = Adw.ActionRow(title=title, subtitle=f"{area} • Intervalo: {interval} dias")
+            row = Adw.ActionRow(title=rev.title, subtitle=f"{rev.area} • Intervalo: {rev.interval_days} dias")
             
             # Color indicator
-            if len(rev) > 7 and rev[7]:
-                valid_color = False
-                col = rev[7]
-                if isinstance(col, str):
-                    try:
-                        if Gdk.RGBA().parse(col):
-                            valid_color = True
-                    except: pass
-                
-                if valid_color:
-                    dot = Gtk.Box()
-                    dot.set_size_request(8, 8)
-                    dot.set_valign(Gtk.Align.CENTER)
-                    try:
-                        provider = Gtk.CssProvider()
-                        css = f"* {{ background-color: {col}; border-radius: 50%; }}"
-                        provider.load_from_data(css.encode())
-                        context = dot.get_style_context()
-                        context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                        row.add_prefix(dot)
-                    except: pass
+            if rev.color:
+                dot = Gtk.Box()
+                dot.set_size_request(8, 8)
+                dot.set_valign(Gtk.Align.CENTER)
+                dot.add_css_class("color-dot")
+                if color_classes.apply(dot, rev.color):
+                    row.add_prefix(dot)
             
-            if status == 'studied':
+            if rev.status == 'studied':
                 row.add_css_class("dim-label")
             
-            if status == 'pending':
+            if rev.status == 'pending':
                 btn_ok = Gtk.Button(icon_name="object-select-symbolic")
                 btn_ok.add_css_class("flat")
                 btn_ok.add_css_class("success")
                 btn_ok.set_valign(Gtk.Align.CENTER)
-                btn_ok.connect("clicked", self.on_action, rev_id, topic_id, 'studied')
+                btn_ok.connect("clicked", self.on_action, rev.id, rev.topic_id, 'studied')
                 row.add_suffix(btn_ok)
                 
                 btn_no = Gtk.Button(icon_name="media-skip-forward-symbolic")
                 btn_no.add_css_class("flat")
                 btn_no.add_css_class("error")
                 btn_no.set_valign(Gtk.Align.CENTER)
-                btn_no.connect("clicked", self.on_action, rev_id, topic_id, 'missed')
+                btn_no.connect("clicked", self.on_action, rev.id, rev.topic_id, 'missed')
                 row.add_suffix(btn_no)
 
                 # Play Button (Only if pending)
@@ -92,21 +77,21 @@ class DailyRevisionsDialog(Adw.Window):
                 btn_play.add_css_class("suggested-action")
                 btn_play.set_valign(Gtk.Align.CENTER)
                 btn_play.set_tooltip_text("Iniciar Estudo")
-                btn_play.connect("clicked", self.on_play_clicked, topic_id, title)
+                btn_play.connect("clicked", self.on_play_clicked, rev.topic_id, rev.title)
                 row.add_suffix(btn_play)
-            elif status == 'studied':
+            elif rev.status == 'studied':
                 btn_undo = Gtk.Button(icon_name="edit-undo-symbolic")
                 btn_undo.add_css_class("flat")
                 btn_undo.set_tooltip_text("Desfazer conclusão")
                 btn_undo.set_valign(Gtk.Align.CENTER)
-                btn_undo.connect("clicked", self.on_action, rev_id, topic_id, 'undo_studied')
+                btn_undo.connect("clicked", self.on_action, rev.id, rev.topic_id, 'undo_studied')
                 row.add_suffix(btn_undo)
             
             btn_edit = Gtk.Button(icon_name="document-edit-symbolic")
             btn_edit.add_css_class("flat")
             btn_edit.set_valign(Gtk.Align.CENTER)
             btn_edit.set_tooltip_text("Editar Tópico")
-            btn_edit.connect("clicked", self.on_edit_clicked, topic_id)
+            btn_edit.connect("clicked", self.on_edit_clicked, rev.topic_id)
             row.add_suffix(btn_edit)
             
             list_box.append(row)
@@ -1,20 +1,19 @@
 from gi.repository import Gtk, Adw, GObject
 from datetime import datetime
-from .revision_popover import RevisionPopover
-import re
+from .colors import color_classes
 
-HEX_COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+# Revisions listed in a cell before the rest collapse into "+N mais"
+MAX_INDICATORS = 2
 
 class DayCell(Gtk.MenuButton):
-    def __init__(self, day, month, year, revisions, logic, refresh_callback, edit_callback=None, **kwargs):
+    def __init__(self, day, month, year, revisions, open_callback, **kwargs):
         super().__init__(**kwargs)
         self.day = day
         self.month = month
         self.year = year
-        self.revisions = revisions
-        self.logic = logic
-        self.refresh_callback = refresh_callback
-        self.edit_callback = edit_callback
+        self.date_str = f"{year}-{month:02d}-{day:02d}"
+        self.revisions = []
+        self.open_callback = open_callback
         
         # Make cell responsive
         self.set_hexpand(True)
@@ -37,12 +36,9 @@ class DayCell(Gtk.MenuButton):
         spacer.set_hexpand(True)
         self.header.append(spacer)
         
-        day_label = Gtk.Label(label=str(day))
-        day_label.add_css_class("caption")
-        if day == datetime.now().day and month == datetime.now().month and year == datetime.now().year:
-            day_label.add_css_class("today-label")
-        
-        self.header.append(day_label)
+        self.day_label = Gtk.Label(label=str(day))
+        self.day_label.add_css_class("caption")
+        self.header.append(self.day_label)
         self.content.append(self.header)
         
         # Revision Indicators Container
@@ -50,54 +46,87 @@ class DayCell(Gtk.MenuButton):
         self.indicators.set_margin_start(4)
         self.indicators.set_margin_end(4)
         self.content.append(self.indicators)
+
+        # Indicator rows are created on first need and then reused: (row, dot, label)
+        self._indicator_rows = []
+        self.more_label = Gtk.Label()
+        self.more_label.add_css_class("caption")
+        self.more_label.add_css_class("dim-label")
+        self.more_label.set_visible(False)
+        self.indicators.append(self.more_label)
+
+        # What the cell currently shows, to skip repaints when nothing changed
+        self._signature = None
+        self.update(revisions)
+
+        # The popover is shared by the whole grid and attached when the cell is opened
+        self.set_create_popup_func(self.on_create_popup)
+
+    def on_create_popup(self, button):
+        self.open_callback(self)
+
+    def update(self, revisions):
+        """Shows revisions, touching only the widgets whose content changed.
+
+        Returns False when the cell already showed exactly this data.
+        """
+        now = datetime.now()
+        is_today = (self.day, self.month, self.year) == (now.day, now.month, now.year)
+        if is_today != self.day_label.has_css_class("today-label"):
+            if is_today:
+                self.day_label.add_css_class("today-label")
+            else:
+                self.day_label.remove_css_class("today-label")
+
+        signature = [(rev.id, rev.title, rev.area, rev.color, rev.status, rev.interval_days) for rev in revisions]
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        self.revisions = revisions
+        self.update_indicators()
+        return True
+
+    def _indicator_row(self, index):
+        if index < len(self._indicator_rows):
+            return self._indicator_rows[index]
+        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
+        row.add_css_class("revision-indicator")
         
-        self.add_indicators()
+        dot = Gtk.Box()
+        dot.set_size_request(4, 4)
+        dot.set_valign(Gtk.Align.CENTER)
+        dot.add_css_class("color-dot")
+        row.append(dot)
         
-        # Popover setup (Standard HIG approach)
-        date_str = f"{year}-{month:02d}-{day:02d}"
-        popover = RevisionPopover(date_str, revisions, logic, refresh_callback, edit_callback)
-        self.set_popover(popover)
+        label = Gtk.Label()
+        label.set_ellipsize(3)
+        label.set_max_width_chars(15)
+        label.set_halign(Gtk.Align.START)
+        label.add_css_class("caption")
+        row.append(label)
+
+        previous = self._indicator_rows[-1][0] if self._indicator_rows else None
+        self.indicators.insert_child_after(row, previous)
+        self._indicator_rows.append((row, dot, label))
+        return self._indicator_rows[index]
 
-    def add_indicators(self):
-        # Show max 2 indicators to keep cells compact
-        for rev in self.revisions[:2]:
-            topic_title = rev[5]
-            indicator = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
-            indicator.add_css_class("revision-indicator")
-            
-            dot = Gtk.Box()
-            dot.set_size_request(4, 4)
-            dot.set_valign(Gtk.Align.CENTER)
-            dot.add_css_class("indicator-dot")
-            
-            # Apply color if available (index 7 from query)
-            if len(rev) > 7 and rev[7]:
-                col = rev[7]
-                if isinstance(col, str) and HEX_COLOR_REGEX.match(col.strip()):
-                    try:
-                        provider = Gtk.CssProvider()
-                        css = f"* {{ background-color: {col}; border-radius: 50%; }}"
-                        provider.load_from_data(css.encode())
-                        context = dot.get_style_context()
-                        context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                    except: pass
-                
-            indicator.append(dot)
-            
-            label = Gtk.Label(label=topic_title)
-            label.set_ellipsize(3)
-            label.set_max_width_chars(15)
-            label.set_halign(Gtk.Align.START)
-            label.add_css_class("caption")
-            if rev[3] == 'studied':
+    def update_indicators(self):
+        # Show at most MAX_INDICATORS rows to keep cells compact
+        shown = self.revisions[:MAX_INDICATORS]
+        for index, rev in enumerate(shown):
+            row, dot, label = self._indicator_row(index)
+            color_classes.apply(dot, rev.color)
+            if label.get_label() != rev.title:
+                label.set_label(rev.title)
+            if rev.status == 'studied':
                 label.add_css_class("studied-text")
-            
-            indicator.append(label)
-            self.indicators.append(indicator)
-            
-        if len(self.revisions) > 2:
-            more_label = Gtk.Label(label=f"+{len(self.revisions) - 2} mais")
-            more_label.add_css_class("caption")
-            more_label.add_css_class("dim-label")
-            self.indicators.append(more_label)
+            else:
+                label.remove_css_class("studied-text")
+            row.set_visible(True)
+        for row, _, _ in self._indicator_rows[len(shown):]:
+            row.set_visible(False)
 
+        hidden = len(self.revisions) - MAX_INDICATORS
+        self.more_label.set_visible(hidden > 0)
+        if hidden > 0:
+            self.more_label.set_label(f"+{hidden} mais")
@@ -1,7 +1,5 @@
 from gi.repository import Gtk, Adw, Gio, GObject, Gdk
-import re
-
-HEX_COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+from .colors import color_classes
 
 class ManagementDialog(Adw.Window):
     def __init__(self, logic, refresh_callback, **kwargs):
@@ -116,28 +114,22 @@ class ManagementDialog(Adw.Window):
             self.areas_list.remove(child)
             child = self.areas_list.get_first_child()
             
-        for area in self.logic.db.get_areas():
-            # area: (id, name, color)
-            row = Adw.ActionRow(title=area[1])
+        areas = self.logic.db.get_areas()
+        tags = self.logic.db.get_managed_tags()
+        # Area and tag edits are the only source of new colors: one stylesheet regeneration
+        color_classes.register([area.color for area in areas] + [tag.color for tag in tags])
+
+        for area in areas:
+            row = Adw.ActionRow(title=area.name)
             
             # Color indicator
-            if len(area) > 2 and area[2]:
-                valid_color = False
-                if isinstance(area[2], str) and HEX_COLOR_REGEX.match(area[2].strip()):
-                    valid_color = True
-                
-                if valid_color:
-                    frame = Gtk.Frame()
-                    frame.set_size_request(16, 16)
-                    frame.set_valign(Gtk.Align.CENTER)
-                    try:
-                        provider = Gtk.CssProvider()
-                        css = f"* {{ background-color: {area[2]}; border-radius: 50%; }}"
-                        provider.load_from_data(css.encode())
-                        context = frame.get_style_context()
-                        context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                        row.add_prefix(frame)
-                    except: pass
+            if area.color:
+                frame = Gtk.Frame()
+                frame.set_size_request(16, 16)
+                frame.set_valign(Gtk.Align.CENTER)
+                frame.add_css_class("color-dot")
+                if color_classes.apply(frame, area.color):
+                    row.add_prefix(frame)
             
             # Wrapper for button alignment
             act_box = Gtk.Box(spacing=6)
@@ -154,7 +146,7 @@ class ManagementDialog(Adw.Window):
             del_btn.add_css_class("flat")
             del_btn.add_css_class("error")
             del_btn.set_valign(Gtk.Align.CENTER)
-            del_btn.connect("clicked", self.on_delete_area, area[0])
+            del_btn.connect("clicked", self.on_delete_area, area.id)
             act_box.append(del_btn)
             
             row.add_suffix(act_box)
@@ -166,27 +158,16 @@ class ManagementDialog(Adw.Window):
             self.tags_list.remove(child)
             child = self.tags_list.get_first_child()
             
-        for tag in self.logic.db.get_managed_tags():
-             # tag: (id, name, color)
-            row = Adw.ActionRow(title=tag[1])
+        for tag in tags:
+            row = Adw.ActionRow(title=tag.name)
             
-            if len(tag) > 2 and tag[2]:
-                valid_color = False
-                if isinstance(tag[2], str) and HEX_COLOR_REGEX.match(tag[2].strip()):
-                    valid_color = True
-
-                if valid_color:
-                    frame = Gtk.Frame()
-                    frame.set_size_request(16, 16)
-                    frame.set_valign(Gtk.Align.CENTER)
-                    try:
-                        provider = Gtk.CssProvider()
-                        css = f"* {{ background-color: {tag[2]}; border-radius: 50%; }}"
-                        provider.load_from_data(css.encode())
-                        context = frame.get_style_context()
-                        context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                        row.add_prefix(frame)
-                    except: pass
+            if tag.color:
+                frame = Gtk.Frame()
+                frame.set_size_request(16, 16)
+                frame.set_valign(Gtk.Align.CENTER)
+                frame.add_css_class("color-dot")
+                if color_classes.apply(frame, tag.color):
+                    row.add_prefix(frame)
 
             # Wrapper for button alignment
             act_box = Gtk.Box(spacing=6)
@@ -203,7 +184,7 @@ class ManagementDialog(Adw.Window):
             del_btn.add_css_class("flat")
             del_btn.add_css_class("error")
             del_btn.set_valign(Gtk.Align.CENTER)
-            del_btn.connect("clicked", self.on_delete_tag, tag[0])
+            del_btn.connect("clicked", self.on_delete_tag, tag.id)
             act_box.append(del_btn)
             
             row.add_suffix(act_box)
@@ -227,7 +208,7 @@ class ManagementDialog(Adw.Window):
         dlg.set_content(box)
         
         entry = Adw.EntryRow(title="Nome")
-        entry.set_text(item_data[1])
+        entry.set_text(item_data.name)
         
         wrapper = Adw.PreferencesGroup()
         wrapper.add(entry)
@@ -236,8 +217,8 @@ class ManagementDialog(Adw.Window):
         color_row = Adw.ActionRow(title="Cor")
         color_btn = Gtk.ColorButton()
         color = Gdk.RGBA()
-        if len(item_data) > 2 and item_data[2]:
-             color.parse(item_data[2])
+        if item_data.color:
+             color.parse(item_data.color)
         color_btn.set_rgba(color)
         color_btn.set_valign(Gtk.Align.CENTER)
         color_row.add_suffix(color_btn)
@@ -249,7 +230,7 @@ class ManagementDialog(Adw.Window):
         save_btn = Gtk.Button(label="Salvar")
         save_btn.add_css_class("suggested-action")
         save_btn.set_halign(Gtk.Align.CENTER)
-        save_btn.connect("clicked", self.on_save_edit_dialog, item_data[0], type, entry, color_btn, dlg)
+        save_btn.connect("clicked", self.on_save_edit_dialog, item_data.id, type, entry, color_btn, dlg)
         box.append(save_btn)
         
         dlg.present()
@@ -1,16 +1,23 @@
 from gi.repository import Gtk, Adw, Gio, GLib
-from ..models import RevisionLogic
 from .day_cell import DayCell
+from .revision_popover import RevisionPopover
 import calendar
 from datetime import datetime
 
 class MonthView(Gtk.Box):
-    def __init__(self, refresh_callback=None, **kwargs):
+    def __init__(self, logic, refresh_callback=None, **kwargs):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0, **kwargs)
         self.refresh_all = refresh_callback
-        self.logic = RevisionLogic()
+        self.logic = logic
+        self.logic.db.subscribe_setting('first_day_of_week', self.on_first_day_changed)
         self.current_date = datetime.now()
         self.cells = {} # Map (day, month, year) to DayCell
+        # (year, month, first day of week) the grid was built for
+        self._layout = None
+        # One popover for the whole grid, created on first use
+        self._popover = None
+        self._popover_cell = None
+        self._prefetch_source = 0
         
         # Navigation Header
         self.header = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
@@ -82,10 +89,45 @@ class MonthView(Gtk.Box):
         self.current_date = datetime.now()
         self.refresh_calendar()
 
+    def on_first_day_changed(self, key, value):
+        self.refresh_calendar()
+
     def refresh_calendar(self):
         # Load setting (0=Mon, 1=Sun)
-        first_day_setting = int(self.logic.db.get_setting('first_day_of_week', '0'))
+        first_day_setting = self.logic.db.get_setting('first_day_of_week')
+        year, month = self.current_date.year, self.current_date.month
         
+        # One query for the whole month instead of one per cell, served from memory when cached
+        month_prefix = f"{year}-{month:02d}"
+        revisions_by_date = self.logic.get_month_revisions(year, month)
+        self.schedule_prefetch()
+
+        layout = (year, month, first_day_setting)
+        if layout == self._layout:
+            # Same month and week layout: only repaint the days whose data changed
+            for (day, _, _), cell in self.cells.items():
+                cell.update(revisions_by_date.get(f"{month_prefix}-{day:02d}", []))
+            return
+        self._layout = layout
+        self.rebuild_grid(first_day_setting, revisions_by_date)
+
+    def schedule_prefetch(self):
+        # Load the neighbouring months once the current one is on screen
+        if not self._prefetch_source:
+            self._prefetch_source = GLib.idle_add(self.prefetch_adjacent_months, priority=GLib.PRIORITY_LOW)
+
+    def prefetch_adjacent_months(self):
+        self._prefetch_source = 0
+        year, month = self.current_date.year, self.current_date.month
+        prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        self.logic.get_month_revisions(prev_year, prev_month)
+        self.logic.get_month_revisions(next_year, next_month)
+        return False
+
+    def rebuild_grid(self, first_day_setting, revisions_by_date):
+        year, month = self.current_date.year, self.current_date.month
+
         # Update Weekday labels in grid
         child = self.weekdays_grid.get_first_child()
         while child:
@@ -108,9 +150,10 @@ class MonthView(Gtk.Box):
         # Update Title
         month_names = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", 
                        "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-        self.title_label.set_label(f"{month_names[self.current_date.month-1]} {self.current_date.year}")
+        self.title_label.set_label(f"{month_names[month-1]} {year}")
         
         # Clear Grid and Cells
+        self.detach_popover()
         self.cells = {}
         child = self.grid.get_first_child()
         while child:
@@ -118,7 +161,7 @@ class MonthView(Gtk.Box):
             child = self.grid.get_first_child()
             
         # UI/UX logic for days
-        month_calendar = calendar.monthcalendar(self.current_date.year, self.current_date.month)
+        month_calendar = calendar.monthcalendar(year, month)
         
         for row_idx, week in enumerate(month_calendar):
             for col_idx, day in enumerate(week):
@@ -128,23 +171,37 @@ class MonthView(Gtk.Box):
                     dummy.add_css_class("day-cell-empty")
                     self.grid.attach(dummy, col_idx, row_idx, 1, 1)
                 else:
-                    date_str = f"{self.current_date.year}-{self.current_date.month:02d}-{day:02d}"
-                    revisions = self.logic.get_upcoming_revisions(date_str)
+                    date_str = f"{year}-{month:02d}-{day:02d}"
+                    revisions = revisions_by_date.get(date_str, [])
                     
-                    cell = DayCell(day, self.current_date.month, self.current_date.year, revisions, self.logic, self.refresh_all, self.on_edit_topic_triggered)
+                    cell = DayCell(day, month, year, revisions, self.on_cell_opened)
                     self.grid.attach(cell, col_idx, row_idx, 1, 1)
-                    self.cells[(day, self.current_date.month, self.current_date.year)] = cell
+                    self.cells[(day, month, year)] = cell
+
+    def on_cell_opened(self, cell):
+        # Re-point the shared popover to the opened cell and fill it on demand
+        if self._popover is None:
+            self._popover = RevisionPopover(self.logic, self.refresh_all, self.on_edit_topic_triggered)
+        if self._popover_cell is not cell:
+            self.detach_popover()
+            cell.set_popover(self._popover)
+            self._popover_cell = cell
+        if self._popover.date_str != cell.date_str or self._popover.revisions is not cell.revisions:
+            self._popover.show_revisions(cell.date_str, cell.revisions)
+
+    def detach_popover(self):
+        if self._popover_cell is not None:
+            self._popover_cell.set_popover(None)
+            self._popover_cell = None
 
     def on_edit_topic_triggered(self, topic_id):
         from .topic_details import TopicDetailsWindow
-        topics = self.logic.db.get_topics()
-        for t in topics:
-            if t[0] == topic_id:
-                win = TopicDetailsWindow(
-                    topic=t,
-                    logic=self.logic,
-                    refresh_callback=self.refresh_all,
-                    transient_for=self.get_native()
-                )
-                win.present()
-                break
+        topic = self.logic.db.get_topic(topic_id)
+        if topic:
+            win = TopicDetailsWindow(
+                topic=topic,
+                logic=self.logic,
+                refresh_callback=self.refresh_all,
+                transient_for=self.get_native()
+            )
+            win.present()
@@ -49,7 +49,7 @@ class NewTopicWindow(Adw.Window):
         
         # Area Selection
         self.areas = self.logic.db.get_areas()
-        self.area_model = Gtk.StringList.new([a[1] for a in self.areas])
+        self.area_model = Gtk.StringList.new([a.name for a in self.areas])
         
         self.entry_area_row = Adw.ComboRow(title="Área", model=self.area_model)
         group.add(self.entry_area_row)
@@ -60,7 +60,7 @@ class NewTopicWindow(Adw.Window):
         
         # Tag Selection
         self.tags_data = self.logic.db.get_managed_tags()
-        self.tag_names = [t[1] for t in self.tags_data]
+        self.tag_names = [t.name for t in self.tags_data]
         self.tag_model = Gtk.StringList.new(self.tag_names)
         
         self.entry_tag_row = Adw.ComboRow(title="Tag", model=self.tag_model)
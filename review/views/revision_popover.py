@@ -1,18 +1,28 @@
 from gi.repository import Gtk, Adw, GObject
 from ..utils import db_to_ui_date
-import re
-
-HEX_COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+from .colors import color_classes
 
 class RevisionPopover(Gtk.Popover):
-    def __init__(self, date_str, revisions, logic, refresh_callback, edit_callback=None, **kwargs):
+    """Revisions of one day with quick actions.
+
+    The month grid keeps a single instance and fills it through
+    show_revisions() when a day is opened.
+    """
+    def __init__(self, logic, refresh_callback, edit_callback=None, **kwargs):
         super().__init__(**kwargs)
         self.logic = logic
         self.refresh_callback = refresh_callback
         self.edit_callback = edit_callback
         self.set_autohide(True)
         self.set_has_arrow(True)
-        
+        self.revisions = []
+        self.date_str = None
+
+    def show_revisions(self, date_str, revisions):
+        """Replaces the content with the revisions of date_str."""
+        self.revisions = revisions
+        self.date_str = date_str
+
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
         main_box.set_margin_start(12)
         main_box.set_margin_end(12)
@@ -29,9 +39,6 @@ class RevisionPopover(Gtk.Popover):
         list_box.set_selection_mode(Gtk.SelectionMode.NONE)
         main_box.append(list_box)
         
-        self.revisions = revisions
-        self.date_str = date_str
-        
         limit = 5
         count = 0
         
@@ -40,47 +47,32 @@ class RevisionPopover(Gtk.Popover):
                 break
             count += 1
             
-            # rev: (id, topic_id, scheduled_date, status, interval_days, title, area, color)
-            rev_id, topic_id, _, status, interval, title, area, _ = rev
             
             # Truncate long titles
-            display_title = title if len(title) <= 40 else title[:37] + "..."
+            display_title = rev.title if len(rev.title) <= 40 else rev.title[:37] + "..."
             
-            row = Adw.ActionRow(title=display_title, subtitle=f"Intervalo: {interval} dias")
+            row = Adw.ActionRow(title=display_title, subtitle=f"Intervalo: {rev.interval_days} dias")
             
             # Color indicator
-            if len(rev) > 7 and rev[7]:
-                col = rev[7]
-                if isinstance(col, str) and HEX_COLOR_REGEX.match(col.strip()):
-                    dot = Gtk.Box()
-                    dot.set_size_request(8, 8)
-                    dot.set_valign(Gtk.Align.CENTER)
-                    # try:
-                    #     provider = Gtk.CssProvider()
-                    #     css = f".indicator-dot {{ background-color: {col}; border-radius: 50%; }}"
-                    #     # css = f"* {{ background-color: {col}; border-radius: 50%; }}" # original selector was *
-                    #     # wait, original selector was * {{ ... }} in popover?
-                    #     # Let's check original content.
-                    #     # It was *
-                    #     css = f"* {{ background-color: {col}; border-radius: 50%; }}"
-                    #     provider.load_from_data(css.encode())
-                    #     context = dot.get_style_context()
-                    #     context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                    #     row.add_prefix(dot)
-                    # except: pass
-                    pass
+            if rev.color:
+                dot = Gtk.Box()
+                dot.set_size_request(8, 8)
+                dot.set_valign(Gtk.Align.CENTER)
+                dot.add_css_class("color-dot")
+                if color_classes.apply(dot, rev.color):
+                    row.add_prefix(dot)
                 
-            if status == 'studied':
+            if rev.status == 'studied':
                 row.add_css_class("dim-label")
             
-            if status == 'pending':
+            if rev.status == 'pending':
                 # Success button
                 btn_ok = Gtk.Button(icon_name="object-select-symbolic")
                 btn_ok.add_css_class("flat")
                 btn_ok.add_css_class("success")
                 btn_ok.set_valign(Gtk.Align.CENTER)
                 btn_ok.set_tooltip_text("Concluir por Hoje")
-                btn_ok.connect("clicked", self.on_action, rev_id, topic_id, 'studied')
+                btn_ok.connect("clicked", self.on_action, rev.id, rev.topic_id, 'studied')
                 row.add_suffix(btn_ok)
                 
                 # Missed/Reschedule button
@@ -89,7 +81,7 @@ class RevisionPopover(Gtk.Popover):
                 btn_no.add_css_class("error")
                 btn_no.set_valign(Gtk.Align.CENTER)
                 btn_no.set_tooltip_text("Estudar Amanhã")
-                btn_no.connect("clicked", self.on_action, rev_id, topic_id, 'missed')
+                btn_no.connect("clicked", self.on_action, rev.id, rev.topic_id, 'missed')
                 row.add_suffix(btn_no)
 
                 # Play Button (Only if pending)
@@ -97,15 +89,15 @@ class RevisionPopover(Gtk.Popover):
                 btn_play.add_css_class("suggested-action")
                 btn_play.set_valign(Gtk.Align.CENTER)
                 btn_play.set_tooltip_text("Iniciar Estudo")
-                btn_play.connect("clicked", self.on_play_clicked, topic_id, title)
+                btn_play.connect("clicked", self.on_play_clicked, rev.topic_id, rev.title)
                 row.add_suffix(btn_play)
-            elif status == 'studied':
+            elif rev.status == 'studied':
                 # Undo 'studied' status
                 btn_undo = Gtk.Button(icon_name="edit-undo-symbolic")
                 btn_undo.add_css_class("flat")
                 btn_undo.set_tooltip_text("Desfazer conclusão")
                 btn_undo.set_valign(Gtk.Align.CENTER)
-                btn_undo.connect("clicked", self.on_action, rev_id, topic_id, 'undo_studied')
+                btn_undo.connect("clicked", self.on_action, rev.id, rev.topic_id, 'undo_studied')
                 row.add_suffix(btn_undo)
             else:
                 # For 'missed' or other statuses
@@ -119,7 +111,7 @@ class RevisionPopover(Gtk.Popover):
             btn_edit.add_css_class("flat")
             btn_edit.set_valign(Gtk.Align.CENTER)
             btn_edit.set_tooltip_text("Editar Tópico")
-            btn_edit.connect("clicked", self.on_edit_clicked, topic_id)
+            btn_edit.connect("clicked", self.on_edit_clicked, rev.topic_id)
             row.add_suffix(btn_edit)
                 
             list_box.append(row)
@@ -1,11 +1,33 @@
+import os
 from gi.repository import Gtk, Adw, Gio, GLib
 from datetime import datetime
+from ..database import (PRAGMA_PROFILES, BackupCancelled, export_backup, export_snapshot, stage_import,
+                        stage_restore)
+from ..snapshots import DEFAULT_KEEP_DAILY
+from ..tasks import BackgroundTask
+
+# Labels for the entries of PRAGMA_PROFILES, in display order
+DB_PROFILE_LABELS = [
+    ('performance', "Desempenho (WAL)"),
+    ('safe', "Segurança máxima"),
+]
+
+# Progress dialog captions for the stages reported by export_backup / stage_import
+BACKUP_STAGE_LABELS = {
+    'read': "Lendo banco de dados...",
+    'kdf': "Derivando chave da senha...",
+    'encrypt': "Criptografando...",
+    'decrypt': "Descriptografando...",
+    'write': "Gravando dados...",
+}
 
 class SettingsDialog(Adw.PreferencesWindow):
     def __init__(self, app, logic, **kwargs):
         super().__init__(**kwargs)
         self.app = app
         self.logic = logic
+        self.backup_task = None
+        self.backup_dialog = None
         
         self.set_title("Configurações")
         self.set_default_size(500, 600)
@@ -58,7 +80,7 @@ class SettingsDialog(Adw.PreferencesWindow):
         self.skip_weekends_switch.set_subtitle("Remove sábados e domingos do cálculo das revisões.")
         
         # Load initial value
-        is_active = self.logic.db.get_setting('skip_weekends', 'False') == 'True'
+        is_active = self.logic.db.get_setting('skip_weekends')
         self.skip_weekends_switch.set_active(is_active)
         
         self.skip_weekends_switch.connect("notify::active", self.on_skip_weekends_toggled)
@@ -73,12 +95,43 @@ class SettingsDialog(Adw.PreferencesWindow):
         )
         
         # Load initial value (0=Monday, 1=Sunday)
-        initial_val = int(self.logic.db.get_setting('first_day_of_week', '0'))
+        initial_val = self.logic.db.get_setting('first_day_of_week')
         self.week_start_row.set_selected(initial_val)
         
         self.week_start_row.connect("notify::selected", self.on_week_start_changed)
         study_group.add(self.week_start_row)
 
+        # Database Group
+        db_group = Adw.PreferencesGroup()
+        db_group.set_title("Banco de Dados")
+        page.add(db_group)
+
+        self.db_profile_keys = [key for key, _ in DB_PROFILE_LABELS if key in PRAGMA_PROFILES]
+        self.db_profile_row = Adw.ComboRow(
+            title="Perfil de desempenho",
+            subtitle="WAL grava mais rápido; o modo seguro sincroniza cada alteração no disco.",
+            model=Gtk.StringList.new([label for key, label in DB_PROFILE_LABELS if key in PRAGMA_PROFILES])
+        )
+        if self.logic.db.pragma_profile in self.db_profile_keys:
+            self.db_profile_row.set_selected(self.db_profile_keys.index(self.logic.db.pragma_profile))
+        self.db_profile_row.connect("notify::selected", self.on_db_profile_changed)
+        db_group.add(self.db_profile_row)
+
+        # Active values as reported by SQLite
+        self.pragma_report_row = Adw.ExpanderRow()
+        self.pragma_report_row.set_title("Valores ativos")
+        self.pragma_report_row.set_subtitle("Parâmetros informados pelo SQLite nesta conexão.")
+        db_group.add(self.pragma_report_row)
+        self.pragma_value_labels = {}
+        for pragma in self.logic.db.get_pragma_report():
+            row = Adw.ActionRow(title=pragma)
+            value_label = Gtk.Label()
+            value_label.add_css_class("dim-label")
+            row.add_suffix(value_label)
+            self.pragma_report_row.add_row(row)
+            self.pragma_value_labels[pragma] = value_label
+        self.refresh_pragma_report()
+
 
 
         # Backup & Restore
@@ -111,6 +164,29 @@ class SettingsDialog(Adw.PreferencesWindow):
         import_row.add_suffix(import_btn)
         backup_group.add(import_row)
 
+        # Incremental snapshots
+        self.snapshot_row = Adw.ActionRow()
+        self.snapshot_row.set_title("Backup Incremental")
+
+        snapshot_dir_btn = Gtk.Button(label="Pasta...")
+        snapshot_dir_btn.set_valign(Gtk.Align.CENTER)
+        snapshot_dir_btn.connect("clicked", self.on_snapshot_dir_clicked)
+        self.snapshot_row.add_suffix(snapshot_dir_btn)
+
+        self.snapshot_btn = Gtk.Button(label="Criar Snapshot")
+        self.snapshot_btn.set_valign(Gtk.Align.CENTER)
+        self.snapshot_btn.connect("clicked", self.on_snapshot_clicked)
+        self.snapshot_row.add_suffix(self.snapshot_btn)
+        backup_group.add(self.snapshot_row)
+        self.refresh_snapshot_row()
+
+        self.snapshot_keep_row = Adw.SpinRow.new_with_range(1, 100, 1)
+        self.snapshot_keep_row.set_title("Snapshots mantidos")
+        self.snapshot_keep_row.set_subtitle(f"Além destes, o último snapshot de cada um dos {DEFAULT_KEEP_DAILY} dias mais recentes é preservado.")
+        self.snapshot_keep_row.set_value(self.logic.db.get_setting('snapshot_keep_last'))
+        self.snapshot_keep_row.connect("notify::value", self.on_snapshot_keep_changed)
+        backup_group.add(self.snapshot_keep_row)
+
         # Danger Zone
         danger_group = Adw.PreferencesGroup()
         danger_group.set_title("Zona de Perigo")
@@ -142,12 +218,20 @@ class SettingsDialog(Adw.PreferencesWindow):
         self.logic.db.set_setting('first_day_of_week', selected)
         # Notify user and trigger refresh
         day_name = "Segunda-feira" if selected == 0 else "Domingo"
+        # The calendars subscribe to this setting and redraw themselves
         self.app.send_notification("Configuração Alterada", f"Primeiro dia da semana definido para {day_name}.")
-        
-        # We need to refresh all views as this affects calendar logic
-        win = self.app.get_active_window()
-        if win and hasattr(win, 'refresh_all_views'):
-            win.refresh_all_views()
+
+    def on_db_profile_changed(self, row, param):
+        selected = row.get_selected()
+        if selected == Gtk.INVALID_LIST_POSITION:
+            return
+        self.logic.db.set_pragma_profile(self.db_profile_keys[selected])
+        self.refresh_pragma_report()
+
+    def refresh_pragma_report(self):
+        for pragma, value in self.logic.db.get_pragma_report().items():
+            if pragma in self.pragma_value_labels:
+                self.pragma_value_labels[pragma].set_label(str(value))
 
     def on_export_clicked(self, btn):
         dialog = Gtk.FileDialog(title="Exportar Banco de Dados")
@@ -214,7 +298,19 @@ class SettingsDialog(Adw.PreferencesWindow):
         dlg.present()
 
     def _do_export(self, path, password):
-        result = self.logic.db.export_database(path, password)
+        db_path = self.logic.db.db_path
+        # The worker reads through its own connection
+        self.logic.db.conn.commit()
+        self._start_backup_task(
+            "Exportando Backup",
+            lambda task: export_backup(db_path, path, password, self._worker_progress(task)),
+            on_done=lambda result: self.on_export_done(result, path, password),
+            on_error=lambda e: self.on_backup_error(e, "Erro na Exportação", "Não foi possível salvar o arquivo."),
+            on_cancelled=lambda: self.on_backup_cancelled("Exportação Cancelada", "Nenhum arquivo foi gravado."),
+        )
+
+    def on_export_done(self, result, path, password):
+        self._close_backup_progress()
         if result is True:
             msg = "Backup criptografado salvo" if password else "Backup salvo"
             self.app.send_notification("Exportação Concluída", f"{msg} em: {path}")
@@ -223,6 +319,114 @@ class SettingsDialog(Adw.PreferencesWindow):
         else:
             self.app.send_notification("Erro na Exportação", "Não foi possível salvar o arquivo.")
 
+    def _start_backup_task(self, heading, func, on_done, on_error, on_cancelled):
+        """Runs an export or import step on a worker thread behind a cancellable progress dialog."""
+        dlg = Adw.MessageDialog(transient_for=self, heading=heading)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        box.set_margin_top(12)
+        self.backup_stage_label = Gtk.Label(label=BACKUP_STAGE_LABELS['read'])
+        self.backup_stage_label.set_xalign(0)
+        box.append(self.backup_stage_label)
+        self.backup_progress_bar = Gtk.ProgressBar()
+        box.append(self.backup_progress_bar)
+        dlg.set_extra_child(box)
+
+        dlg.add_response("cancel", "Cancelar")
+        dlg.connect("response", self.on_backup_progress_response)
+        self.backup_dialog = dlg
+        dlg.present()
+
+        self.backup_task = BackgroundTask(
+            func,
+            on_progress=self.on_backup_progress,
+            on_done=on_done,
+            on_error=on_error,
+            on_cancelled=on_cancelled,
+        )
+        self.backup_task.start()
+
+    def _worker_progress(self, task):
+        """Progress callback for the worker: forwards to the dialog, aborts once cancelled."""
+        def progress(stage, fraction):
+            if task.is_cancelled():
+                raise BackupCancelled()
+            task.report_progress(stage, fraction)
+        return progress
+
+    def on_backup_progress(self, stage, fraction):
+        if self.backup_dialog:
+            self.backup_stage_label.set_label(BACKUP_STAGE_LABELS.get(stage, ""))
+            self.backup_progress_bar.set_fraction(fraction)
+
+    def on_backup_progress_response(self, dlg, response):
+        # The dialog closes itself on any response; only a user close cancels
+        if self.backup_dialog is None:
+            return
+        self.backup_dialog = None
+        self.backup_task.cancel()
+
+    def _close_backup_progress(self):
+        dlg = self.backup_dialog
+        self.backup_dialog = None
+        if dlg:
+            dlg.close()
+
+    def on_backup_error(self, error, heading, message):
+        print(f"Backup task failed: {error}")
+        self._close_backup_progress()
+        self.app.send_notification(heading, message)
+
+    def on_backup_cancelled(self, heading, message):
+        self._close_backup_progress()
+        self.app.send_notification(heading, message)
+
+    def refresh_snapshot_row(self):
+        snapshot_dir = self.logic.db.get_setting('snapshot_dir')
+        if snapshot_dir:
+            self.snapshot_row.set_subtitle(f"Grava apenas os blocos alterados em: {snapshot_dir}")
+        else:
+            self.snapshot_row.set_subtitle("Escolha uma pasta para guardar os snapshots.")
+        self.snapshot_btn.set_sensitive(bool(snapshot_dir))
+
+    def on_snapshot_dir_clicked(self, btn):
+        dialog = Gtk.FileDialog(title="Pasta dos Snapshots")
+        dialog.select_folder(self, None, self.on_snapshot_dir_finish)
+
+    def on_snapshot_dir_finish(self, dialog, result):
+        try:
+            folder = dialog.select_folder_finish(result)
+            if folder:
+                self.logic.db.set_setting('snapshot_dir', folder.get_path())
+                self.refresh_snapshot_row()
+        except GLib.Error as e:
+            print(f"Snapshot folder selection cancelled or failed: {e}")
+
+    def on_snapshot_keep_changed(self, row, param):
+        self.logic.db.set_setting('snapshot_keep_last', int(row.get_value()))
+
+    def on_snapshot_clicked(self, btn):
+        db_path = self.logic.db.db_path
+        snapshot_dir = self.logic.db.get_setting('snapshot_dir')
+        keep_last = int(self.snapshot_keep_row.get_value())
+        self.logic.db.conn.commit()
+        self._start_backup_task(
+            "Criando Snapshot",
+            lambda task: export_snapshot(db_path, snapshot_dir, keep_last, DEFAULT_KEEP_DAILY,
+                                         progress=self._worker_progress(task)),
+            on_done=self.on_snapshot_done,
+            on_error=lambda e: self.on_backup_error(e, "Erro no Snapshot", "Não foi possível gravar o snapshot."),
+            on_cancelled=lambda: self.on_backup_cancelled("Snapshot Cancelado", "Os snapshots anteriores continuam disponíveis."),
+        )
+
+    def on_snapshot_done(self, result):
+        self._close_backup_progress()
+        snapshot_id, written, removed = result
+        msg = f"{written} blocos novos gravados."
+        if removed:
+            msg += f" {len(removed)} snapshots antigos removidos."
+        self.app.send_notification("Snapshot Criado", msg)
+
     def on_import_clicked(self, btn):
         # Warning before import
         dialog = Adw.MessageDialog(
@@ -245,8 +449,14 @@ class SettingsDialog(Adw.PreferencesWindow):
             filter_db.set_name("Arquivo de Banco de Dados (.db)")
             filter_db.add_pattern("*.db")
             
+            # Incremental snapshots are restored from their manifest
+            filter_snapshot = Gtk.FileFilter()
+            filter_snapshot.set_name("Snapshot Incremental (.json)")
+            filter_snapshot.add_pattern("*.json")
+            
             filters = Gio.ListStore.new(Gtk.FileFilter)
             filters.append(filter_db)
+            filters.append(filter_snapshot)
             file_dialog.set_filters(filters)
             
             file_dialog.open(self, None, self.on_import_finish)
@@ -261,7 +471,42 @@ class SettingsDialog(Adw.PreferencesWindow):
             print(f"Import cancelled or failed: {e}")
 
     def _do_import(self, path, password=None):
-        result = self.logic.db.import_database(path, password)
+        # Decryption, copy and migration run on the worker; the UI connection is only swapped at the end
+        db_path = self.logic.db.db_path
+        self._start_backup_task(
+            "Importando Backup",
+            lambda task: self._stage_import(path, password, db_path, self._worker_progress(task)),
+            on_done=lambda staged: self.on_import_staged(path, *staged),
+            on_error=lambda e: self.on_backup_error(e, "Erro na Importação", "Falha ao importar o arquivo. Verifique se é um banco de dados válido."),
+            on_cancelled=lambda: self.on_backup_cancelled("Importação Cancelada", "Seus dados atuais não foram alterados."),
+        )
+
+    def _stage_import(self, path, password, db_path, progress):
+        # Runs on the worker thread
+        result, plain_path = stage_import(path, password, progress)
+        if result is not True:
+            return result, None
+        try:
+            return True, stage_restore(db_path, plain_path, progress)
+        finally:
+            if plain_path != path:
+                os.remove(plain_path)
+
+    def on_import_staged(self, path, result, restore_path):
+        if self.backup_task.is_cancelled():
+            # Cancelled after staging finished: the live database stays as it was
+            if restore_path and os.path.exists(restore_path):
+                os.remove(restore_path)
+            self.on_backup_cancelled("Importação Cancelada", "Seus dados atuais não foram alterados.")
+            return
+        if result is True:
+            try:
+                self.logic.db.swap_in(restore_path)
+            except Exception as e:
+                print(f"Error importing database: {e}")
+                result = False
+        self._close_backup_progress()
+
         if result is True:
             self.app.send_notification("Importação Concluída", "Seus dados foram restaurados com sucesso.")
             win = self.app.get_active_window()
@@ -273,6 +518,10 @@ class SettingsDialog(Adw.PreferencesWindow):
             self._prompt_import_password(path, "Senha incorreta. Tente novamente.")
         elif result == "CRYPTO_MISSING":
             self.app.send_notification("Erro: Criptografia Indisponível", "A biblioteca 'cryptography' não está instalada. Não é possível descriptografar o arquivo.")
+        elif result == "UNSUPPORTED_FORMAT":
+            self.app.send_notification("Erro na Importação", "Este backup foi criado por uma versão mais recente do Review.")
+        elif result == "SNAPSHOT_CORRUPTED":
+            self.app.send_notification("Erro na Importação", "O snapshot está incompleto ou danificado.")
         else:
             self.app.send_notification("Erro na Importação", "Falha ao importar o arquivo. Verifique se é um banco de dados válido.")
 
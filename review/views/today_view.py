@@ -1,10 +1,7 @@
 from gi.repository import Gtk, Adw, Gio, GLib, Gdk
-from ..models import RevisionLogic
 from datetime import datetime, timedelta
 from ..utils import db_to_ui_date
-import re
-
-HEX_COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+from .colors import color_classes
 
 def format_time(seconds):
     """Format time intelligently: minutes until 59, then hours"""
@@ -68,8 +65,8 @@ class TodayTopicRow(Adw.ActionRow):
         self.set_size_request(-1, 72)
         
         # Title and subtitle - with ellipsization
-        self.set_title(topic[1])  # Topic title
-        self.set_subtitle(topic[2])  # Area
+        self.set_title(topic.title)
+        self.set_subtitle(topic.area)
         
         # Enable ellipsization to prevent multi-line titles
         title_widget = self.get_first_child()
@@ -96,21 +93,8 @@ class TodayTopicRow(Adw.ActionRow):
         color_dot = Gtk.Box()
         color_dot.set_size_request(10, 10)
         color_dot.set_valign(Gtk.Align.CENTER)
-        color_dot.add_css_class("indicator-dot")
-        
-        display_color = topic[5] if len(topic) > 5 and topic[5] else None
-        if len(topic) > 7 and topic[7] and str(topic[7]).strip():
-            display_color = topic[7]
-            
-        if display_color and isinstance(display_color, str) and HEX_COLOR_REGEX.match(display_color.strip()):
-            try:
-                provider = Gtk.CssProvider()
-                css = f".indicator-dot {{ background-color: {display_color}; border-radius: 50%; }}"
-                provider.load_from_data(css.encode())
-                color_dot.get_style_context().add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-            except:
-                pass
-            
+        color_dot.add_css_class("color-dot")
+        color_classes.apply(color_dot, topic.display_color)
         self.add_prefix(color_dot)
         
         # Action buttons
@@ -137,7 +121,7 @@ class TodayTopicRow(Adw.ActionRow):
         details_btn.connect("clicked", self.on_details_clicked)
         button_box.append(details_btn)
         
-        if self.revision[3] == 'studied':  # Completed
+        if self.revision.status == 'studied':  # Completed
             # Show "Concluído" label and undo button
             completed_label = Gtk.Label(label="Concluído")
             completed_label.add_css_class("success")
@@ -189,29 +173,20 @@ class TodayTopicRow(Adw.ActionRow):
         """Start study session"""
         window = self.get_native()
         if hasattr(window, 'start_timer'):
-            window.start_timer(self.topic[0], self.topic[1])
+            window.start_timer(self.topic.id, self.topic.title)
     
     def on_skip_clicked(self, btn):
         """Skip to tomorrow"""
         tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-        cursor = self.logic.db.conn.cursor()
-        cursor.execute('UPDATE revisions SET scheduled_date = ? WHERE id = ?', 
-                      (tomorrow, self.revision[0]))
-        self.logic.db.conn.commit()
+        self.logic.db.update_revision_date(self.revision.id, tomorrow)
         
         if self.refresh_callback:
             self.refresh_callback()
     
     def on_complete_clicked(self, btn):
         """Mark as completed"""
-        cursor = self.logic.db.conn.cursor()
-        cursor.execute('UPDATE revisions SET status = ? WHERE id = ?', 
-                      ('studied', self.revision[0]))
-        self.logic.db.conn.commit()
-        
-        self.revision = list(self.revision)
-        self.revision[3] = 'studied'
-        self.revision = tuple(self.revision)
+        self.logic.db.update_revision_status(self.revision.id, 'studied')
+        self.revision.status = 'studied'
         
         self.update_buttons()
         
@@ -220,14 +195,8 @@ class TodayTopicRow(Adw.ActionRow):
     
     def on_undo_clicked(self, btn):
         """Undo completion"""
-        cursor = self.logic.db.conn.cursor()
-        cursor.execute('UPDATE revisions SET status = ? WHERE id = ?', 
-                      ('pending', self.revision[0]))
-        self.logic.db.conn.commit()
-        
-        self.revision = list(self.revision)
-        self.revision[3] = 'pending'
-        self.revision = tuple(self.revision)
+        self.logic.db.update_revision_status(self.revision.id, 'pending')
+        self.revision.status = 'pending'
         
         self.update_buttons()
         
@@ -235,9 +204,9 @@ class TodayTopicRow(Adw.ActionRow):
             self.refresh_callback()
 
 class TodayView(Gtk.Box):
-    def __init__(self, refresh_callback=None, **kwargs):
+    def __init__(self, logic, refresh_callback=None, **kwargs):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0, **kwargs)
-        self.logic = RevisionLogic()
+        self.logic = logic
         self.refresh_all = refresh_callback
         
         # Main scrolled window
@@ -323,10 +292,7 @@ class TodayView(Gtk.Box):
             self.time_today_stat.set_value(format_time(today_seconds))
             
             # Get total study time (all time)
-            cursor = self.logic.db.conn.cursor()
-            cursor.execute('SELECT SUM(duration_seconds) FROM study_sessions')
-            total_result = cursor.fetchone()[0]
-            total_seconds = total_result if total_result else 0
+            total_seconds = self.logic.db.get_total_study_time()
             self.time_total_stat.set_value(format_time(total_seconds))
             
         except Exception as e:
@@ -343,29 +309,15 @@ class TodayView(Gtk.Box):
         try:
             today_str = datetime.now().strftime('%Y-%m-%d')
             
-            # Get all revisions for today (both pending and studied)
-            cursor = self.logic.db.conn.cursor()
-            cursor.execute('''
-                SELECT r.*, t.title, t.area, t.color 
-                FROM revisions r
-                JOIN topics t ON r.topic_id = t.id
-                WHERE r.scheduled_date = ?
-                ORDER BY r.status ASC, t.title ASC
-            ''', (today_str,))
-            revisions = cursor.fetchall()
+            # Revisions for today (both pending and studied) with their topics
+            revisions = self.logic.db.get_revisions_with_topics(today_str)
             
             # Update topics count
             self.topics_stat.set_value(str(len(revisions)))
             
-            # Get full topic data for each revision
-            for revision in revisions:
-                topic_id = revision[1]
-                topics = self.logic.db.get_topics()
-                topic = next((t for t in topics if t[0] == topic_id), None)
-                
-                if topic:
-                    row = TodayTopicRow(revision, topic, self.logic, self.refresh_all if self.refresh_all else self.refresh_view, self)
-                    self.list_box.append(row)
+            for revision, topic in revisions:
+                row = TodayTopicRow(revision, topic, self.logic, self.refresh_all if self.refresh_all else self.refresh_view, self)
+                self.list_box.append(row)
             
             self.list_box.set_visible(len(revisions) > 0)
             self.empty_page.set_visible(len(revisions) == 0)
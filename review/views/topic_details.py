@@ -1,16 +1,17 @@
 from gi.repository import Gtk, Adw, Gio, GObject
 from ..utils import db_to_ui_date, ui_to_db_date
+from ..database import split_tags
 from datetime import datetime
 
 class TopicDetailsWindow(Adw.Window):
     def __init__(self, topic, logic, refresh_callback, **kwargs):
         super().__init__(**kwargs)
-        self.topic = topic # (id, title, area, start_date, tags, color, description)
+        self.topic = topic
         self.logic = logic
         self.refresh_callback = refresh_callback
         
         self.set_default_size(500, 650)
-        self.set_title(f"Detalhes: {topic[1]}")
+        self.set_title(f"Detalhes: {topic.title}")
         self.set_modal(True)
         
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -57,31 +58,33 @@ class TopicDetailsWindow(Adw.Window):
         content.append(info_group)
         
         self.entry_title = Adw.EntryRow(title="Título")
-        self.entry_title.set_text(topic[1])
+        self.entry_title.set_text(topic.title)
         info_group.add(self.entry_title)
         
         # Area Selection
         self.areas_data = self.logic.db.get_areas()
-        self.area_names = [a[1] for a in self.areas_data]
+        self.area_names = [a.name for a in self.areas_data]
         self.area_model = Gtk.StringList.new(self.area_names)
         
         self.entry_area_row = Adw.ComboRow(title="Área", model=self.area_model)
-        if topic[2] in self.area_names:
-            self.entry_area_row.set_selected(self.area_names.index(topic[2]))
+        if topic.area in self.area_names:
+            self.entry_area_row.set_selected(self.area_names.index(topic.area))
         info_group.add(self.entry_area_row)
         
         self.entry_start = Adw.EntryRow(title="Data de Início")
-        self.entry_start.set_text(db_to_ui_date(topic[3]))
+        self.entry_start.set_text(db_to_ui_date(topic.start_date))
         info_group.add(self.entry_start)
         
         # Tag Selection
         self.tags_data = self.logic.db.get_managed_tags()
-        self.tag_names = [t[1] for t in self.tags_data]
+        self.tag_names = [t.name for t in self.tags_data]
         self.tag_model = Gtk.StringList.new(self.tag_names)
         
+        # The row edits the first tag; any others are kept on save
+        self.topic_tags = split_tags(topic.tags)
         self.entry_tags_row = Adw.ComboRow(title="Tag", model=self.tag_model)
-        if topic[4] in self.tag_names:
-            self.entry_tags_row.set_selected(self.tag_names.index(topic[4]))
+        if self.topic_tags and self.topic_tags[0] in self.tag_names:
+            self.entry_tags_row.set_selected(self.tag_names.index(self.topic_tags[0]))
         info_group.add(self.entry_tags_row)
 
         # Time Spent (Read Only)
@@ -90,9 +93,7 @@ class TopicDetailsWindow(Adw.Window):
         
         time_row = Adw.ActionRow(title="Tempo Total de Estudo")
         
-        seconds = 0
-        if len(topic) > 7:
-             seconds = topic[7] if topic[7] else 0
+        seconds = topic.time_spent
              
         hours, remainder = divmod(seconds, 3600)
         minutes, _ = divmod(remainder, 60)
@@ -113,7 +114,7 @@ class TopicDetailsWindow(Adw.Window):
         self.txt_desc.set_left_margin(6)
         self.txt_desc.set_right_margin(6)
         buf = self.txt_desc.get_buffer()
-        buf.set_text(topic[6] if topic[6] else "")
+        buf.set_text(topic.description or "")
         
         desc_scrolled = Gtk.ScrolledWindow()
         desc_scrolled.set_min_content_height(100)
@@ -130,18 +131,20 @@ class TopicDetailsWindow(Adw.Window):
         area = self.area_model.get_string(selected_idx) if selected_idx != Gtk.INVALID_LIST_POSITION else ""
         
         selected_tag_idx = self.entry_tags_row.get_selected()
-        tags = self.tag_model.get_string(selected_tag_idx) if selected_tag_idx != Gtk.INVALID_LIST_POSITION else ""
+        tag = self.tag_model.get_string(selected_tag_idx) if selected_tag_idx != Gtk.INVALID_LIST_POSITION else ""
+        tags = ",".join([tag] + self.topic_tags[1:])
         
         start_date = ui_to_db_date(self.entry_start.get_text())
-        color = self.topic[5]
+        color = self.topic.color
         
         buf = self.txt_desc.get_buffer()
         start_iter, end_iter = buf.get_bounds()
         description = buf.get_text(start_iter, end_iter, True)
         
         if title:
-            self.logic.db.update_topic(self.topic[0], title, area, start_date, tags, color, description)
-            self.logic.sync_revisions_to_start_date(self.topic[0], start_date)
+            with self.logic.db.transaction():
+                self.logic.db.update_topic(self.topic.id, title, area, start_date, tags, color, description)
+                self.logic.sync_revisions_to_start_date(self.topic.id, start_date)
             if self.refresh_callback:
                 self.refresh_callback()
             self.close()
@@ -160,7 +163,7 @@ class TopicDetailsWindow(Adw.Window):
 
     def on_delete_confirm(self, dialog, response):
         if response == "delete":
-            self.logic.db.delete_topic(self.topic[0])
+            self.logic.db.delete_topic(self.topic.id)
             if self.refresh_callback:
                 self.refresh_callback()
             self.close()
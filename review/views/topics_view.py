@@ -1,90 +1,105 @@
-from gi.repository import Gtk, Adw, Gio, GObject, Gdk
-from ..models import RevisionLogic
+from gi.repository import Gtk, Adw, Gio, GObject, Gdk, GLib
 from datetime import datetime
 from .topic_details import TopicDetailsWindow
 from .new_topic_dialog import NewTopicWindow
 from ..utils import db_to_ui_date, normalize_str
-import re
+from ..database import SNIPPET_START, SNIPPET_END
+from .colors import color_classes
 
-HEX_COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+# Keystrokes closer together than this run a single search
+SEARCH_DEBOUNCE_MS = 200
+
+def snippet_markup(snippet):
+    """Pango markup for a search snippet, matched terms in bold."""
+    text = GLib.markup_escape_text(snippet)
+    return text.replace(SNIPPET_START, "<b>").replace(SNIPPET_END, "</b>")
+
+def _filter_change(old_matches, new_matches):
+    """How the visible set moved between two search results (None = no search), or None if it didn't."""
+    old_ids = None if old_matches is None else old_matches.keys()
+    new_ids = None if new_matches is None else new_matches.keys()
+    if old_ids == new_ids:
+        return None
+    if old_ids is None or (new_ids is not None and new_ids <= old_ids):
+        return Gtk.FilterChange.MORE_STRICT
+    if new_ids is None or old_ids <= new_ids:
+        return Gtk.FilterChange.LESS_STRICT
+    return Gtk.FilterChange.DIFFERENT
+
+class TopicItem(GObject.Object):
+    """List model item for one topic, with its normalized sort keys recomputed only when the topic changes."""
+    subtitle = GObject.Property(type=str, default="")
+
+    def __init__(self, topic):
+        super().__init__()
+        self.topic = topic
+        self.snippet = None
+        # Field values the keys and the bound row were built from
+        self._state = None
+        self.refresh()
+
+    def refresh(self, topic=None):
+        """Recomputes the cached keys after the topic was reloaded; returns False if nothing changed.
+
+        topic replaces the held object, e.g. once a restore or rollback emptied the identity map.
+        """
+        if topic is not None and topic is not self.topic:
+            self.topic = topic
+            self._state = None
+        state = tuple(getattr(self.topic, name) for name in self.topic.__slots__)
+        if state == self._state:
+            return False
+        self._state = state
+        self.title_key = normalize_str(self.topic.title)
+        self.area_key = normalize_str(self.topic.area)
+        self._update_subtitle()
+        return True
+
+    def set_snippet(self, snippet):
+        if snippet != self.snippet:
+            self.snippet = snippet
+            self._update_subtitle()
+
+    def _update_subtitle(self):
+        subtitle = GLib.markup_escape_text(self.topic.area or "")
+        if self.snippet:
+            # Search results show where the query matched
+            subtitle = f"{subtitle} • {snippet_markup(self.snippet)}"
+        if subtitle != self.subtitle:
+            self.subtitle = subtitle
 
 class TopicRow(Adw.ActionRow):
-    def __init__(self, topic, logic, refresh_callback, parent_view, **kwargs):
+    """Recyclable row: built once by the list factory, then bound to whichever TopicItem scrolls into view."""
+    def __init__(self, parent_view, **kwargs):
         super().__init__(**kwargs)
-        self.topic_id = topic[0]
-        self.topic = topic
-        self.logic = logic
-        self.refresh_callback = refresh_callback
         self.parent_view = parent_view
+        self.topic = None
+        self._subtitle_binding = None
         
         self.add_css_class("card")
         self.set_margin_bottom(8)
-        self.set_activatable(True)
         
-        self.set_title(topic[1])
-        self.set_subtitle(topic[2]) # Subtitle is just the Area name
-        
-        # Color indicator
-        color_dot = Gtk.Box()
-        color_dot.set_size_request(10, 10)
-        color_dot.set_valign(Gtk.Align.CENTER)
-        color_dot.add_css_class("indicator-dot")
-        
-        display_color = topic[5]
-        # t.* has 8 columns (0-7), a.color is at index 8
-        if len(topic) > 8 and topic[8]:
-            display_color = topic[8]
-            
-        valid_color = False
-        if display_color and isinstance(display_color, str):
-            if HEX_COLOR_REGEX.match(str(display_color).strip()):
-                valid_color = True
-
-        if valid_color:
-            try:
-                provider = Gtk.CssProvider()
-                css = f".indicator-dot {{ background-color: {display_color}; border-radius: 50%; }}"
-                provider.load_from_data(css.encode())
-                color_dot.get_style_context().add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-            except Exception:
-                pass
-
-        self.add_prefix(color_dot)
+        # Color indicator; bind swaps its color class
+        self.color_dot = Gtk.Box()
+        self.color_dot.set_size_request(10, 10)
+        self.color_dot.set_valign(Gtk.Align.CENTER)
+        self.color_dot.add_css_class("color-dot")
+        self.add_prefix(self.color_dot)
         
         # Suffix components
         suffix_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=16)
         suffix_box.set_valign(Gtk.Align.CENTER)
         
         # Next Revision Info
-        next_rev = self.get_next_revision(topic[0])
-        if next_rev:
-            next_date_ui = db_to_ui_date(next_rev[2])
-            today = datetime.now().strftime('%Y-%m-%d')
-            
-            next_lbl = Gtk.Label()
-            next_lbl.add_css_class("caption")
-            
-            if next_rev[2] < today:
-                next_lbl.set_label(f"Atrasado: {next_date_ui}")
-                next_lbl.add_css_class("error")
-            elif next_rev[2] == today:
-                next_lbl.set_label("Revisão Hoje")
-                next_lbl.add_css_class("success")
-            else:
-                next_lbl.set_label(f"Próxima: {next_date_ui}")
-                next_lbl.add_css_class("dim-label")
-            
-            suffix_box.append(next_lbl)
+        self.next_lbl = Gtk.Label()
+        self.next_lbl.add_css_class("caption")
+        suffix_box.append(self.next_lbl)
         
         # Time Spent
-        time_spent = topic[7] if len(topic) > 7 and topic[7] is not None else 0
-        hours, remainder = divmod(time_spent, 3600)
-        minutes, _ = divmod(remainder, 60)
-        
-        time_lbl = Gtk.Label(label=f"{hours}h {minutes}m")
-        time_lbl.add_css_class("dim-label")
-        time_lbl.add_css_class("caption")
-        suffix_box.append(time_lbl)
+        self.time_lbl = Gtk.Label()
+        self.time_lbl.add_css_class("dim-label")
+        self.time_lbl.add_css_class("caption")
+        suffix_box.append(self.time_lbl)
 
         self.add_suffix(suffix_box)
         
@@ -93,6 +108,41 @@ class TopicRow(Adw.ActionRow):
         gesture.set_button(3)
         gesture.connect("pressed", self.on_right_click)
         self.add_controller(gesture)
+
+    def bind(self, item):
+        topic = self.topic = item.topic
+        self.set_title(topic.title)
+        # Area name, plus the matched snippet while searching
+        self._subtitle_binding = item.bind_property("subtitle", self, "subtitle", GObject.BindingFlags.SYNC_CREATE)
+
+        color_classes.apply(self.color_dot, topic.display_color)
+
+        next_date = topic.next_revision_date
+        for css_class in ("error", "success", "dim-label"):
+            self.next_lbl.remove_css_class(css_class)
+        self.next_lbl.set_visible(bool(next_date))
+        if next_date:
+            next_date_ui = db_to_ui_date(next_date)
+            today = datetime.now().strftime('%Y-%m-%d')
+            if next_date < today:
+                self.next_lbl.set_label(f"Atrasado: {next_date_ui}")
+                self.next_lbl.add_css_class("error")
+            elif next_date == today:
+                self.next_lbl.set_label("Revisão Hoje")
+                self.next_lbl.add_css_class("success")
+            else:
+                self.next_lbl.set_label(f"Próxima: {next_date_ui}")
+                self.next_lbl.add_css_class("dim-label")
+
+        hours, remainder = divmod(topic.time_spent, 3600)
+        minutes, _ = divmod(remainder, 60)
+        self.time_lbl.set_label(f"{hours}h {minutes}m")
+
+    def unbind(self):
+        if self._subtitle_binding is not None:
+            self._subtitle_binding.unbind()
+            self._subtitle_binding = None
+        self.topic = None
     
     def on_right_click(self, gesture, n_press, x, y):
         menu = Gio.Menu()
@@ -117,22 +167,18 @@ class TopicRow(Adw.ActionRow):
         popover.insert_action_group("topic", action_group)
         popover.popup()
 
-    def get_next_revision(self, topic_id):
-        cursor = self.logic.db.conn.cursor()
-        cursor.execute('''
-            SELECT * FROM revisions 
-            WHERE topic_id = ? AND status = 'pending' 
-            ORDER BY scheduled_date ASC LIMIT 1
-        ''', (topic_id,))
-        return cursor.fetchone()
-
 
 class TopicsView(Gtk.Box):
-    def __init__(self, refresh_callback=None, **kwargs):
+    def __init__(self, logic, refresh_callback=None, **kwargs):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0, **kwargs)
-        self.logic = RevisionLogic()
+        self.logic = logic
         self.refresh_all_external = refresh_callback
         self.current_area_filter = None
+        # Topic id -> TopicItem, reused across reloads
+        self._items = {}
+        # Topic id -> snippet of the current search, None when not searching
+        self._search_matches = None
+        self._search_timeout_id = 0
         
         # Main Content Box
         self.content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -149,7 +195,8 @@ class TopicsView(Gtk.Box):
         self.search_entry = Gtk.SearchEntry()
         self.search_entry.set_hexpand(True)
         self.search_entry.set_placeholder_text("Pesquisar tópicos")
-        self.search_entry.connect("search-changed", self.on_search_changed)
+        # "changed" fires on every keystroke; on_search_changed does its own debouncing
+        self.search_entry.connect("changed", self.on_search_changed)
         control_bar.append(self.search_entry)
 
         self.sort_dropdown = Gtk.DropDown.new_from_strings(["Título (A-Z)", "Por Área", "Mais Recentes Primeiro"])
@@ -162,23 +209,36 @@ class TopicsView(Gtk.Box):
         self.scrolled.set_vexpand(True)
         self.content_box.append(self.scrolled)
         
-        clamp = Adw.Clamp()
+        # A scrollable clamp keeps the list view directly scrollable, which is what lets it virtualize
+        clamp = Adw.ClampScrollable()
         clamp.set_maximum_size(800)
         self.scrolled.set_child(clamp)
+
+        # Model chain: store -> area/search filter -> sort. Filter and sort
+        # changes only emit items-changed for the rows that actually move.
+        self.store = Gio.ListStore.new(TopicItem)
+        self.filter = Gtk.CustomFilter.new(self._filter_item)
+        self.filter_model = Gtk.FilterListModel.new(self.store, self.filter)
+        self.sorter = Gtk.CustomSorter.new(self._compare_items)
+        self.sort_model = Gtk.SortListModel.new(self.filter_model, self.sorter)
+        self.sort_model.connect("items-changed", lambda *args: self._update_empty_state())
+
+        # Only rows in the viewport exist; the factory recycles them as the list scrolls
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_factory_setup)
+        factory.connect("bind", self.on_factory_bind)
+        factory.connect("unbind", self.on_factory_unbind)
+
+        self.list_view = Gtk.ListView(model=Gtk.NoSelection.new(self.sort_model), factory=factory)
+        self.list_view.set_single_click_activate(True)
+        self.list_view.set_margin_top(12)
+        self.list_view.set_margin_bottom(32)
+        self.list_view.set_margin_start(12)
+        self.list_view.set_margin_end(12)
+        self.list_view.connect("activate", self.on_row_activated)
+        self.list_view.add_css_class("transparent-list")
         
-        self.list_box = Gtk.ListBox()
-        self.list_box.set_selection_mode(Gtk.SelectionMode.NONE)
-        self.list_box.set_margin_top(12)
-        self.list_box.set_margin_bottom(32)
-        self.list_box.set_margin_start(12)
-        self.list_box.set_margin_end(12)
-        self.list_box.connect("row-activated", self.on_row_activated)
-        
-        provider = Gtk.CssProvider()
-        provider.load_from_data("list { background-color: transparent; }".encode())
-        self.list_box.get_style_context().add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-        
-        clamp.set_child(self.list_box)
+        clamp.set_child(self.list_view)
 
         # Empty State
         self.empty_page = Adw.StatusPage()
@@ -197,49 +257,122 @@ class TopicsView(Gtk.Box):
         self.refresh_topics()
 
     def refresh_topic_list(self):
-        child = self.list_box.get_first_child()
-        while child:
-            self.list_box.remove(child)
-            child = self.list_box.get_first_child()
-            
-        search_text = normalize_str(self.search_entry.get_text())
+        """Applies the current topics to the store, touching only added, removed and edited ones.
+
+        Unchanged items keep their position, bound row and scroll state; the
+        model chain re-applies search, area filter and sort to the rest.
+        """
         topics = self.logic.db.get_topics()
-        
+        topics_by_id = {topic.id: topic for topic in topics}
+        # Backwards, so removals don't shift the positions still to visit
+        for position in range(self.store.get_n_items() - 1, -1, -1):
+            item = self.store.get_item(position)
+            topic = topics_by_id.get(item.topic.id)
+            if topic is None:
+                self.store.remove(position)
+                del self._items[item.topic.id]
+            elif item.refresh(topic):
+                # Re-inserting the same item makes the filter, sorter and row re-read just this one
+                self.store.splice(position, 1, [item])
+
+        new_items = [TopicItem(topic) for topic in topics if topic.id not in self._items]
+        for item in new_items:
+            self._items[item.topic.id] = item
+        change = self._update_search() if self._search_matches is not None else None
+        if new_items:
+            self.store.splice(self.store.get_n_items(), 0, new_items)
+        if change is not None:
+            self.filter.changed(change)
+        self._update_empty_state()
+
+    def on_factory_setup(self, factory, list_item):
+        list_item.set_child(TopicRow(self))
+
+    def on_factory_bind(self, factory, list_item):
+        list_item.get_child().bind(list_item.get_item())
+
+    def on_factory_unbind(self, factory, list_item):
+        list_item.get_child().unbind()
+
+    def _update_empty_state(self):
+        has_items = self.sort_model.get_n_items() > 0
+        self.scrolled.set_visible(has_items)
+        self.empty_page.set_visible(not has_items)
+
+    def _filter_item(self, item, *args):
+        if self.current_area_filter and item.topic.area != self.current_area_filter:
+            return False
+        return self._search_matches is None or item.topic.id in self._search_matches
+
+    def _sort_key(self, item):
         sort_idx = self.sort_dropdown.get_selected()
-        if sort_idx == 0: topics.sort(key=lambda x: x[1].lower())
-        elif sort_idx == 1: topics.sort(key=lambda x: (x[2].lower(), x[1].lower()))
-        elif sort_idx == 2: topics.sort(key=lambda x: (x[3], x[1].lower()), reverse=True)
-
-        filtered_count = 0
-        for topic in topics:
-            if self.current_area_filter and topic[2] != self.current_area_filter: continue
-            if search_text and search_text not in normalize_str(topic[1]): continue
-            row = TopicRow(topic, self.logic, self.refresh_all_external if self.refresh_all_external else self.refresh_whole_view, self)
-            self.list_box.append(row)
-            filtered_count += 1
-        self.scrolled.set_visible(filtered_count > 0)
-        self.empty_page.set_visible(filtered_count == 0)
+        if sort_idx == 1: return (item.area_key, item.title_key)
+        if sort_idx == 2: return (item.topic.start_date, item.title_key)
+        return (item.title_key,)
+
+    def _compare_items(self, a, b, *args):
+        key_a, key_b = self._sort_key(a), self._sort_key(b)
+        order = (key_a > key_b) - (key_a < key_b)
+        # "Mais Recentes Primeiro" is descending
+        return -order if self.sort_dropdown.get_selected() == 2 else order
+
+    def _update_search(self):
+        """Re-runs the full-text search; returns the Gtk.FilterChange it implies, or None."""
+        text = self.search_entry.get_text().strip()
+        old_matches = self._search_matches
+        new_matches = None
+        if text:
+            # Accent-insensitive prefix match on title and description
+            new_matches = {topic.id: snippet for topic, snippet in self.logic.db.search_topics(text, limit=None)}
+        # Only items entering or leaving the result set can have a new snippet
+        for topic_id in set(old_matches or ()) | set(new_matches or ()):
+            item = self._items.get(topic_id)
+            if item is not None:
+                item.set_snippet((new_matches or {}).get(topic_id))
+        self._search_matches = new_matches
+        return _filter_change(old_matches, new_matches)
+
+    def set_area_filter(self, area_name):
+        if area_name == self.current_area_filter:
+            return
+        previous = self.current_area_filter
+        self.current_area_filter = area_name
+        if previous is None:
+            self.filter.changed(Gtk.FilterChange.MORE_STRICT)
+        elif area_name is None:
+            self.filter.changed(Gtk.FilterChange.LESS_STRICT)
+        else:
+            self.filter.changed(Gtk.FilterChange.DIFFERENT)
 
     def on_sort_changed(self, dropdown, pspec):
-        self.refresh_topic_list()
+        self.sorter.changed(Gtk.SorterChange.DIFFERENT)
 
     def on_area_selected(self, listbox, row):
-        if row: self.current_area_filter = getattr(row, 'area_name', None)
-        self.refresh_topic_list()
+        if row: self.set_area_filter(getattr(row, 'area_name', None))
 
     def on_search_changed(self, entry):
-        self.refresh_topic_list()
+        # Coalesce a burst of keystrokes into one search
+        if self._search_timeout_id:
+            GLib.source_remove(self._search_timeout_id)
+        self._search_timeout_id = GLib.timeout_add(SEARCH_DEBOUNCE_MS, self._on_search_timeout)
+
+    def _on_search_timeout(self):
+        self._search_timeout_id = 0
+        change = self._update_search()
+        if change is not None:
+            self.filter.changed(change)
+        return GLib.SOURCE_REMOVE
     
     def on_edit_topic(self, topic):
         win = TopicDetailsWindow(topic=topic, logic=self.logic, refresh_callback=self.refresh_all_external if self.refresh_all_external else self.refresh_whole_view, transient_for=self.get_native())
         win.present()
     
     def on_delete_topic(self, topic):
-        dialog = Adw.MessageDialog(transient_for=self.get_native(), heading="Apagar Tópico?", body=f"Deseja realmente apagar o tópico '{topic[1]}'? Todas as revisões associadas também serão removidas.")
+        dialog = Adw.MessageDialog(transient_for=self.get_native(), heading="Apagar Tópico?", body=f"Deseja realmente apagar o tópico '{topic.title}'? Todas as revisões associadas também serão removidas.")
         dialog.add_response("cancel", "Cancelar")
         dialog.add_response("delete", "Apagar")
         dialog.set_response_appearance("delete", Adw.ResponseAppearance.DESTRUCTIVE)
-        dialog.connect("response", self.on_delete_topic_response, topic[0])
+        dialog.connect("response", self.on_delete_topic_response, topic.id)
         dialog.present()
     
     def on_delete_topic_response(self, dialog, response, topic_id):
@@ -251,14 +384,13 @@ class TopicsView(Gtk.Box):
                 self.refresh_whole_view()
         dialog.destroy()
 
-    def on_row_activated(self, listbox, row):
-        if hasattr(row, 'topic_id'):
-            topics = self.logic.db.get_topics()
-            for t in topics:
-                if t[0] == row.topic_id:
-                    win = TopicDetailsWindow(topic=t, logic=self.logic, refresh_callback=self.refresh_all_external if self.refresh_all_external else self.refresh_whole_view, transient_for=self.get_native())
-                    win.present()
-                    break
+    def on_row_activated(self, list_view, position):
+        item = self.sort_model.get_item(position)
+        if item is not None:
+            topic = self.logic.db.get_topic(item.topic.id)
+            if topic:
+                win = TopicDetailsWindow(topic=topic, logic=self.logic, refresh_callback=self.refresh_all_external if self.refresh_all_external else self.refresh_whole_view, transient_for=self.get_native())
+                win.present()
 
     def on_add_topic_clicked(self, btn):
         dlg = NewTopicWindow(logic=self.logic, refresh_callback=self.refresh_all_external if self.refresh_all_external else self.refresh_whole_view, transient_for=self.get_native())
@@ -308,12 +440,12 @@ class TopicsView(Gtk.Box):
         content = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
         entry = Gtk.Entry()
         entry.set_placeholder_text("Nome da área")
-        if area: entry.set_text(area[1])
+        if area: entry.set_text(area.name)
         content.append(entry)
         color_btn = Gtk.ColorButton()
-        if area and len(area) > 2 and area[2]:
+        if area and area.color:
             rgba = Gdk.RGBA()
-            if rgba.parse(area[2]): color_btn.set_rgba(rgba)
+            if rgba.parse(area.color): color_btn.set_rgba(rgba)
         content.append(color_btn)
         dialog.set_extra_child(content)
         dialog.add_response("cancel", "Cancelar")
@@ -327,14 +459,17 @@ class TopicsView(Gtk.Box):
             name = entry.get_text()
             color = color_btn.get_rgba().to_string()
             if name:
-                if area: self.logic.db.update_area(area[0], name, color)
+                if area:
+                    self.logic.db.update_area(area.id, name, color)
+                    # Keep the sidebar filter on the renamed area
+                    if self.current_area_filter == area.name: self.current_area_filter = name
                 else: self.logic.db.add_area(name, color)
                 self.refresh_whole_view()
         dialog.destroy()
 
     def confirm_delete_area(self, area):
         title = "Apagar Área?"
-        body = f"Deseja realmente apagar a área '{area[1]}'? Os tópicos desta área não serão apagados, mas ficarão sem área associada."
+        body = f"Deseja realmente apagar a área '{area.name}'? Os tópicos desta área não serão apagados, mas ficarão sem área associada."
         dialog = Adw.MessageDialog(transient_for=self.get_native(), heading=title, body=body)
         dialog.add_response("cancel", "Cancelar")
         dialog.add_response("delete", "Apagar")
@@ -344,7 +479,7 @@ class TopicsView(Gtk.Box):
 
     def on_delete_area_response(self, dialog, response, area):
         if response == "delete":
-            self.logic.db.delete_area(area[0])
-            if self.current_area_filter == area[1]: self.current_area_filter = None
+            self.logic.db.delete_area(area.id)
+            if self.current_area_filter == area.name: self.current_area_filter = None
             self.refresh_whole_view()
         dialog.destroy()
@@ -1,6 +1,6 @@
 from gi.repository import Gtk, Adw, GObject
 from datetime import datetime, timedelta
-from ..models import RevisionLogic
+from .colors import color_classes
 
 class WeekDayCell(Gtk.Button):
     """Simplified day cell for week view - no popover, just selection"""
@@ -50,27 +50,15 @@ class WeekDayCell(Gtk.Button):
     def add_indicators(self):
         # Show max 2 indicators to keep cells compact
         for rev in self.revisions[:2]:
-            topic_title = rev[5]
+            topic_title = rev.title
             indicator = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
             indicator.add_css_class("revision-indicator")
             
             dot = Gtk.Box()
             dot.set_size_request(4, 4)
             dot.set_valign(Gtk.Align.CENTER)
-            dot.add_css_class("indicator-dot")
-            
-            # Apply color if available (index 7 from query)
-            if len(rev) > 7 and rev[7]:
-                col = rev[7]
-                if isinstance(col, str) and HEX_COLOR_REGEX.match(col.strip()):
-                    try:
-                        provider = Gtk.CssProvider()
-                        css = f"* {{ background-color: {col}; border-radius: 50%; }}"
-                        provider.load_from_data(css.encode())
-                        context = dot.get_style_context()
-                        context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                    except: pass
-                
+            dot.add_css_class("color-dot")
+            color_classes.apply(dot, rev.color)
             indicator.append(dot)
             
             label = Gtk.Label(label=topic_title)
@@ -78,7 +66,7 @@ class WeekDayCell(Gtk.Button):
             label.set_max_width_chars(15)
             label.set_halign(Gtk.Align.START)
             label.add_css_class("caption")
-            if rev[3] == 'studied':
+            if rev.status == 'studied':
                 label.add_css_class("studied-text")
             
             indicator.append(label)
@@ -94,13 +82,14 @@ class WeekDayCell(Gtk.Button):
 
 
 class WeekView(Gtk.Box):
-    def __init__(self, refresh_callback=None, **kwargs):
+    def __init__(self, logic, refresh_callback=None, **kwargs):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, **kwargs)
         self.refresh_all = refresh_callback
-        self.logic = RevisionLogic()
+        self.logic = logic
+        self.logic.db.subscribe_setting('first_day_of_week', self.on_first_day_changed)
         
         # Load setting (0=Mon, 1=Sun)
-        self.first_day_setting = int(self.logic.db.get_setting('first_day_of_week', '0'))
+        self.first_day_setting = self.logic.db.get_setting('first_day_of_week')
         
         # Current week start
         today = datetime.now()
@@ -203,7 +192,7 @@ class WeekView(Gtk.Box):
     
     def build_week(self):
         # Refresh setting
-        self.first_day_setting = int(self.logic.db.get_setting('first_day_of_week', '0'))
+        self.first_day_setting = self.logic.db.get_setting('first_day_of_week')
         
         # Clear existing grid
         while True:
@@ -234,6 +223,10 @@ class WeekView(Gtk.Box):
             label.set_margin_bottom(4)
             self.week_grid.attach(label, col, 0, 1, 1)
         
+        # Fetch the whole week in one query
+        week_start_str = self.current_week_start.strftime('%Y-%m-%d')
+        revisions_by_date = self.logic.get_revisions_between(week_start_str, week_end.strftime('%Y-%m-%d'))
+        
         # Week days
         for col in range(7):
             day_date = self.current_week_start + timedelta(days=col)
@@ -243,7 +236,7 @@ class WeekView(Gtk.Box):
             
             # Get revisions for this day
             date_str = day_date.strftime('%Y-%m-%d')
-            revisions = self.logic.get_upcoming_revisions(date_str)
+            revisions = revisions_by_date.get(date_str, [])
             
             # Create day cell
             cell = WeekDayCell(day, month, year, revisions)
@@ -288,7 +281,8 @@ class WeekView(Gtk.Box):
 
         
         for rev in revisions:
-            rev_id, topic_id, scheduled_date, status, interval, topic_title, area, color = rev
+            rev_id, topic_id, status, interval = rev.id, rev.topic_id, rev.status, rev.interval_days
+            topic_title, area, color = rev.title, rev.area, rev.color
             
             row = Adw.ActionRow()
             row.set_title(topic_title)
@@ -299,12 +293,9 @@ class WeekView(Gtk.Box):
                 dot = Gtk.Box()
                 dot.set_size_request(12, 12)
                 dot.set_valign(Gtk.Align.CENTER)
-                provider = Gtk.CssProvider()
-                css = f"* {{ background-color: {color}; border-radius: 50%; }}"
-                provider.load_from_data(css.encode())
-                context = dot.get_style_context()
-                context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                row.add_prefix(dot)
+                dot.add_css_class("color-dot")
+                if color_classes.apply(dot, color):
+                    row.add_prefix(dot)
             
             # Action buttons
             btn_box = Gtk.Box(spacing=6)
@@ -399,7 +390,7 @@ class WeekView(Gtk.Box):
     
     def on_today_clicked(self, btn):
         today = datetime.now()
-        self.first_day_setting = int(self.logic.db.get_setting('first_day_of_week', '0'))
+        self.first_day_setting = self.logic.db.get_setting('first_day_of_week')
         if self.first_day_setting == 1: # Sunday
             days_since_sun = (today.weekday() + 1) % 7
             self.current_week_start = today - timedelta(days=days_since_sun)
@@ -424,6 +415,10 @@ class WeekView(Gtk.Box):
         empty.set_icon_name("calendar-mth-symbolic")
         self.revisions_box.append(empty)
     
+    def on_first_day_changed(self, key, value):
+        # Week boundaries depend on the setting; restart from the current week
+        self.on_today_clicked(None)
+
     def refresh_calendar(self):
         """Refresh the current week view"""
         self.build_week()
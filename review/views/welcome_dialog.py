@@ -201,7 +201,7 @@ class WelcomeDialog(Adw.Window):
     def refresh_topic_fields(self):
         areas = self.logic.db.get_areas()
         # Update combo model
-        self.area_model.splice(0, self.area_model.get_n_items(), [a[1] for a in areas])
+        self.area_model.splice(0, self.area_model.get_n_items(), [a.name for a in areas])
         if areas:
             self.area_combo.set_selected(len(areas) - 1) # Select the newly created one
 
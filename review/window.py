@@ -2,14 +2,13 @@ from .views.month_view import MonthView
 from .views.week_view import WeekView
 from .views.topics_view import TopicsView
 from .views.timer_widget import TimerWidget
+from .views.colors import color_classes
 from gi.repository import Gtk, Adw, Gio, GObject, GLib, Gdk
-import re
-
-HEX_COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
 
 class ReviewWindow(Adw.ApplicationWindow):
-    def __init__(self, **kwargs):
+    def __init__(self, logic, **kwargs):
         super().__init__(**kwargs)
+        self.logic = logic
 
         self.set_title("Review")
         self.set_default_size(1100, 700)
@@ -126,13 +125,13 @@ class ReviewWindow(Adw.ApplicationWindow):
 
         # Views
         from .views.today_view import TodayView
-        self.today_view = TodayView(refresh_callback=self.refresh_all_views)
+        self.today_view = TodayView(logic=self.logic, refresh_callback=self.refresh_all_views)
         self.stack.add_named(self.today_view, "today")
 
-        self.month_view = MonthView(refresh_callback=self.refresh_all_views)
+        self.month_view = MonthView(logic=self.logic, refresh_callback=self.refresh_all_views)
         self.stack.add_named(self.month_view, "overview")
 
-        self.topics_view = TopicsView(refresh_callback=self.refresh_all_views)
+        self.topics_view = TopicsView(logic=self.logic, refresh_callback=self.refresh_all_views)
         self.stack.add_named(self.topics_view, "topics")
 
         # Breakpoint
@@ -158,15 +157,12 @@ class ReviewWindow(Adw.ApplicationWindow):
         self.main_box.append(self.timer_widget)
 
         # Show Welcome Dialog if DB is empty (first run or reset)
-        # Check logic or db directly. Assuming logic is passed or created in window,
-        # but window creates TopicsView which creates logic. 
-        # Accessing logic via self.topics_view.logic is easiest.
-        if self.topics_view.logic.db.is_empty():
+        if self.logic.db.is_empty():
             GLib.idle_add(self.show_welcome_dialog)
 
     def show_welcome_dialog(self):
         from .views.welcome_dialog import WelcomeDialog
-        dlg = WelcomeDialog(logic=self.topics_view.logic, refresh_callback=self.refresh_all_views, transient_for=self)
+        dlg = WelcomeDialog(logic=self.logic, refresh_callback=self.refresh_all_views, transient_for=self)
         dlg.present()
 
     def _setup_actions(self):
@@ -199,26 +195,24 @@ class ReviewWindow(Adw.ApplicationWindow):
 
     def on_manage_activated(self, action, param):
         from .views.management_dialog import ManagementDialog
-        dlg = ManagementDialog(logic=self.topics_view.logic, refresh_callback=self.refresh_all_views, transient_for=self)
+        dlg = ManagementDialog(logic=self.logic, refresh_callback=self.refresh_all_views, transient_for=self)
         dlg.present()
 
     def on_preferences_activated(self, action, param):
         from .views.settings_dialog import SettingsDialog
         # We pass self.application intentionally
-        dlg = SettingsDialog(app=self.get_application(), logic=self.topics_view.logic, transient_for=self)
+        dlg = SettingsDialog(app=self.get_application(), logic=self.logic, transient_for=self)
         dlg.present()
 
     def on_bulk_import_activated(self, action, param):
         from .views.bulk_import_dialog import BulkImportDialog
-        # Use existing logic for database consistency
-        logic = self.topics_view.logic
-        dlg = BulkImportDialog(logic=logic, refresh_callback=self.refresh_all_views, transient_for=self)
+        dlg = BulkImportDialog(logic=self.logic, refresh_callback=self.refresh_all_views, transient_for=self)
         dlg.connect("destroy", lambda w: self._on_import_closed())
         dlg.present()
 
     def _on_import_closed(self):
         def check_and_reshow():
-            if hasattr(self, 'topics_view') and self.topics_view.logic.db.is_empty():
+            if self.logic.db.is_empty():
                 self.show_welcome_dialog()
             return False
         GLib.idle_add(check_and_reshow)
@@ -248,9 +242,11 @@ class ReviewWindow(Adw.ApplicationWindow):
             child = next_child
         
         # Add current areas
-        areas = self.topics_view.logic.db.get_areas()
+        areas = self.logic.db.get_areas()
+        # Any new or edited area color lands in the shared stylesheet in one regeneration
+        color_classes.register(area.color for area in areas)
         for area in areas:
-            self.add_nav_item(area[1], "tag-symbolic", f"area:{area[1]}", color=area[2])
+            self.add_nav_item(area.name, "tag-symbolic", f"area:{area.name}", color=area.color)
 
     def add_nav_item(self, title, icon_name, view_name, color=None):
         row = Gtk.ListBoxRow()
@@ -262,24 +258,13 @@ class ReviewWindow(Adw.ApplicationWindow):
         box.set_margin_start(12)
         box.set_margin_end(12)
         
-        valid_color = False
-        if color and isinstance(color, str):
-            if HEX_COLOR_REGEX.match(color.strip()):
-                valid_color = True
-
-        if valid_color:
+        if color and color_classes.class_for(color):
             dot = Gtk.Box()
             dot.set_size_request(8, 8)
             dot.set_valign(Gtk.Align.CENTER)
             dot.add_css_class("color-dot")
-            try:
-                provider = Gtk.CssProvider()
-                css = f".color-dot {{ background-color: {color}; border-radius: 50%; }}"
-                provider.load_from_data(css.encode())
-                dot.get_style_context().add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-                box.append(dot)
-            except Exception:
-                pass
+            color_classes.apply(dot, color)
+            box.append(dot)
         else:
             icon = Gtk.Image.new_from_icon_name(icon_name)
             icon.set_pixel_size(16)
@@ -300,13 +285,11 @@ class ReviewWindow(Adw.ApplicationWindow):
             if view_name.startswith("area:"):
                 if not hasattr(self, 'topics_view'): return
                 area_name = view_name.split(":", 1)[1]
-                self.topics_view.current_area_filter = area_name
-                self.topics_view.refresh_topic_list()
+                self.topics_view.set_area_filter(area_name)
                 self.stack.set_visible_child_name("topics")
             else:
                 if view_name == "topics" and hasattr(self, 'topics_view'):
-                    self.topics_view.current_area_filter = None
-                    self.topics_view.refresh_topic_list()
+                    self.topics_view.set_area_filter(None)
                 self.stack.set_visible_child_name(view_name)
             
             # On narrow windows, hide sidebar after selection
@@ -328,6 +311,8 @@ class ReviewWindow(Adw.ApplicationWindow):
     
     def on_refresh_clicked(self, btn):
         """Refresh the current calendar view"""
+        # An explicit refresh always reads the database again
+        self.logic.clear_month_cache()
         current_view = self.stack.get_visible_child_name()
         if current_view == "today" and hasattr(self.today_view, 'refresh_view'):
             self.today_view.refresh_view()
@@ -357,9 +342,7 @@ class ReviewWindow(Adw.ApplicationWindow):
         self.timer_widget.start_session(topic_id, topic_title)
 
     def on_session_finished(self, widget, topic_id, duration):
-        # Determine current active logic (e.g. from topics_view usually)
-        logic = self.topics_view.logic 
-        logic.register_study_session(topic_id, duration)
+        self.logic.register_study_session(topic_id, duration)
         self.refresh_all_views()
 
     def on_timer_fullscreen_toggled(self, widget, is_fullscreen):
@@ -1,12 +1,18 @@
 import sys
 import os
+import sqlite3
+import tempfile
 from datetime import datetime, timedelta
 
 # Add current dir to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from review.models import RevisionLogic
-from review.database import DB_PATH
+from review.models import RevisionLogic, MONTH_CACHE_SIZE
+from review.database import (DB_PATH, DatabaseManager, SCHEMA_VERSION, MIGRATIONS, BackupCancelled, export_backup,
+                             SNIPPET_START, SNIPPET_END, stage_restore)
+from review.importer import BulkImporter, ImportCancelled
+from review import backup_crypto
+from review.snapshots import SnapshotStore
 
 def test_revision_logic():
     # Remove existing test DB if any
@@ -23,27 +29,643 @@ def test_revision_logic():
     print(f"Created Topic ID: {topic_id}")
     print("Initial Revisions:")
     for r in revisions:
-        print(f"  ID: {r[0]}, Date: {r[2]}, Interval: {r[4]}")
+        print(f"  ID: {r.id}, Date: {r.scheduled_date}, Interval: {r.interval_days}")
 
     print("\n--- Test 2: Mark as Not Studied (Shift) ---")
     # Mark the first revision (7 days) as not studied
-    first_rev_id = revisions[0][0]
+    first_rev_id = revisions[0].id
     logic.mark_as_not_studied(first_rev_id, topic_id)
     
     revisions_after = logic.db.get_revisions_for_topic(topic_id)
     print("Revisions after shift:")
     for r in revisions_after:
-        print(f"  ID: {r[0]}, Date: {r[2]}, Interval: {r[4]}")
+        print(f"  ID: {r.id}, Date: {r.scheduled_date}, Interval: {r.interval_days}")
 
     # Verify shift
-    d1_old = datetime.strptime(revisions[0][2], '%Y-%m-%d')
-    d1_new = datetime.strptime(revisions_after[0][2], '%Y-%m-%d')
+    d1_old = datetime.strptime(revisions[0].scheduled_date, '%Y-%m-%d')
+    d1_new = datetime.strptime(revisions_after[0].scheduled_date, '%Y-%m-%d')
     assert (d1_new - d1_old).days == 1
     
-    d3_old = datetime.strptime(revisions[2][2], '%Y-%m-%d')
-    d3_new = datetime.strptime(revisions_after[2][2], '%Y-%m-%d')
+    d3_old = datetime.strptime(revisions[2].scheduled_date, '%Y-%m-%d')
+    d3_new = datetime.strptime(revisions_after[2].scheduled_date, '%Y-%m-%d')
     assert (d3_new - d3_old).days == 1
     print("\nVerification Passed: All future revisions shifted by 1 day.")
 
+def test_schema_migrations():
+    # A pre-versioning database: user_version 0 and an old topics table
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE topics (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, area TEXT, start_date TEXT NOT NULL, tags TEXT, color TEXT)")
+        conn.execute("INSERT INTO topics (title, area, start_date) VALUES ('Old', 'Area', '2026-01-01')")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(path)
+        assert db.get_schema_version() == SCHEMA_VERSION
+        cursor = db.conn.cursor()
+        cursor.execute("PRAGMA table_info(topics)")
+        columns = {row[1] for row in cursor.fetchall()}
+        assert {"description", "time_spent", "area_id"} <= columns
+        # The free-text area became an areas row
+        assert [(t.title, t.area) for t in db.get_topics()] == [("Old", "Area")]
+
+        # Day lookups must be served by an index, not a table scan
+        cursor.execute("EXPLAIN QUERY PLAN SELECT * FROM revisions WHERE scheduled_date = ?", ("2026-01-01",))
+        plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "idx_revisions_scheduled_date" in plan, plan
+        db.close()
+
+        # Reopening is a no-op
+        db = DatabaseManager(path)
+        assert db.get_schema_version() == SCHEMA_VERSION
+        db.close()
+    print("Schema migrations OK.")
+
+def test_one_commit_per_action():
+    with tempfile.TemporaryDirectory() as tmp:
+        logic = RevisionLogic(DatabaseManager(os.path.join(tmp, "tx.db")))
+        statements = []
+        logic.db.conn.set_trace_callback(statements.append)
+
+        topic_id = logic.create_topic_with_revisions("Topic", "Area", "2026-01-05", "", "#3584e4")
+        first_rev_id = logic.db.get_revisions_for_topic(topic_id)[0].id
+        del statements[:]
+        logic.mark_as_studied(first_rev_id)
+        assert statements.count("COMMIT") == 1, statements
+        assert len(logic.db.get_revisions_for_topic(topic_id)) == 4
+
+        seven_day_rev_id = logic.db.get_revisions_for_topic(topic_id)[1].id
+        del statements[:]
+        logic.mark_as_not_studied(seven_day_rev_id, topic_id)
+        assert statements.count("COMMIT") == 1, statements
+
+        # A failing block leaves nothing behind
+        try:
+            with logic.db.transaction():
+                logic.db.add_topic("Ghost", "Area", "2026-01-05", "", None)
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert [t.title for t in logic.db.get_topics()] == ["Topic"]
+        logic.db.close()
+    print("Transactions OK.")
+
+def test_bulk_import_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "import.db")
+        csv_path = os.path.join(tmp, "topics.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("nome_topico,area,data_inicio,tag,descricao\n")
+            for i in range(5):
+                f.write(f"Tópico {i},Área {i % 2},05/02/2026,\"tag, extra\",\"multi\nline\"\n")
+        DatabaseManager(db_path).close()
+
+        fractions = []
+        importer = BulkImporter(db_path, progress=fractions.append, chunk_size=2)
+        assert importer.run(csv_path) == 5
+        assert fractions[-1] == 1.0 and fractions == sorted(fractions)
+
+        db = DatabaseManager(db_path)
+        assert db.conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0] == 5
+        assert db.conn.execute("SELECT COUNT(*) FROM revisions").fetchone()[0] == 5
+        assert sorted(db.get_area_ids_by_name()) == ["Área 0", "Área 1"]
+        # A quoted tag list becomes separate, colored managed tags
+        assert {t.name: t.color for t in db.get_managed_tags()} == {"tag": "#555555", "extra": "#555555"}
+        assert {t.tags for t in db.get_topics()} == {"tag,extra"}
+        db.close()
+
+        # Cancelling keeps the chunks that were already committed
+        importer = BulkImporter(db_path, chunk_size=2,
+                                is_cancelled=lambda: importer.imported >= 2)
+        try:
+            importer.run(csv_path)
+            assert False, "expected ImportCancelled"
+        except ImportCancelled:
+            pass
+        db = DatabaseManager(db_path)
+        assert db.conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0] == 7
+        db.close()
+    print("Bulk import OK.")
+
+def test_encrypted_backup_container():
+    if not backup_crypto.CRYPTO_AVAILABLE:
+        print("cryptography not installed, skipping.")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = os.path.join(tmp, "plain.bin")
+        sealed = os.path.join(tmp, "sealed.bin")
+        opened = os.path.join(tmp, "opened.bin")
+        data = os.urandom(3 * 1024 + 7)
+        with open(plain, "wb") as f:
+            f.write(data)
+
+        backup_crypto.encrypt_file(plain, sealed, "senha", iterations=1000, chunk_size=1024)
+        backup_crypto.decrypt_file(sealed, opened, "senha")
+        with open(opened, "rb") as f:
+            assert f.read() == data
+
+        for password, content in (("errada", None), ("senha", "truncated")):
+            if content == "truncated":
+                # Drop the whole final frame (length + 7 bytes + GCM tag)
+                with open(sealed, "r+b") as f:
+                    f.truncate(os.path.getsize(sealed) - (4 + 7 + 16))
+            try:
+                backup_crypto.decrypt_file(sealed, opened, password)
+                assert False, "expected InvalidPassword"
+            except backup_crypto.InvalidPassword:
+                pass
+
+        # Header fields and frame lengths are bounded before any KDF round or read
+        backup_crypto.encrypt_file(plain, sealed, "senha", iterations=1000, chunk_size=1024)
+        with open(sealed, "rb") as f:
+            container = f.read()
+        fields = list(backup_crypto._HEADER.unpack(container[:backup_crypto._HEADER.size]))
+        fields[3] = backup_crypto.MAX_KDF_ITERATIONS + 1
+        with open(sealed, "wb") as f:
+            f.write(backup_crypto._HEADER.pack(*fields) + container[backup_crypto._HEADER.size:])
+        try:
+            backup_crypto.decrypt_file(sealed, opened, "senha")
+            assert False, "expected UnsupportedFormat"
+        except backup_crypto.UnsupportedFormat:
+            pass
+        with open(sealed, "wb") as f:
+            f.write(container[:backup_crypto._HEADER.size] + (1024 + 17).to_bytes(4, "big")
+                    + container[backup_crypto._HEADER.size + 4:])
+        try:
+            backup_crypto.decrypt_file(sealed, opened, "senha")
+            assert False, "expected InvalidPassword"
+        except backup_crypto.InvalidPassword:
+            pass
+
+        db = DatabaseManager(os.path.join(tmp, "source.db"))
+        db.add_area("Matemática", "#123456")
+        backup = os.path.join(tmp, "backup.review")
+        assert db.export_database(backup, password="senha") is True
+
+        # A cancelled export leaves nothing behind at the target path
+        def cancel_on_encrypt(stage, fraction):
+            if stage == "encrypt":
+                raise BackupCancelled()
+        cancelled = os.path.join(tmp, "cancelled.review")
+        try:
+            export_backup(db.db_path, cancelled, "senha", progress=cancel_on_encrypt)
+            assert False, "expected BackupCancelled"
+        except BackupCancelled:
+            pass
+        assert not os.path.exists(cancelled) and not os.path.exists(cancelled + ".part")
+        db.close()
+
+        restored = DatabaseManager(os.path.join(tmp, "restored.db"))
+        assert restored.import_database(backup) == "PASSWORD_REQUIRED"
+        assert restored.import_database(backup, password="errada") == "INVALID_PASSWORD"
+        assert restored.import_database(backup, password="senha") is True
+        assert [a.name for a in restored.get_areas()] == ["Matemática"]
+        restored.close()
+    print("Encrypted backup OK.")
+
+def test_incremental_snapshots():
+    with tempfile.TemporaryDirectory() as tmp:
+        backup_dir = os.path.join(tmp, "snapshots")
+        db = DatabaseManager(os.path.join(tmp, "source.db"))
+        db.add_topics_many([(f"Tópico {i}", "Área", "2026-02-05", "tag", "#999999", "x" * 200)
+                            for i in range(5000)])
+        first_id, first_written, _ = db.export_snapshot(backup_dir)
+
+        db.add_area("Nova", "#123456")
+        second_id, second_written, _ = db.export_snapshot(backup_dir)
+        # Only the blocks holding changed pages are stored again
+        assert 0 < second_written < first_written / 4
+
+        store = SnapshotStore(backup_dir)
+        restored = DatabaseManager(os.path.join(tmp, "restored.db"))
+        assert restored.import_database(store.manifest_path(first_id)) is True
+        # Topics create their area on insert
+        assert [a.name for a in restored.get_areas()] == ["Área"]
+        assert restored.import_database(store.manifest_path(second_id)) is True
+        assert [a.name for a in restored.get_areas()] == ["Nova", "Área"]
+
+        for _ in range(3):
+            db.export_snapshot(backup_dir, keep_last=2, keep_daily=0)
+        assert len(store.list_snapshots()) == 2
+        assert store.collect_garbage() == 0
+        db.close()
+        restored.close()
+    print("Incremental snapshots OK.")
+
+def test_staged_restore():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = DatabaseManager(os.path.join(tmp, "source.db"))
+        source.add_topic("Do Backup", "Matemática", "2026-01-05", "", None, "")
+        backup = os.path.join(tmp, "backup.db")
+        assert source.export_database(backup) is True
+        source.close()
+
+        db = DatabaseManager(os.path.join(tmp, "live.db"))
+        db.add_topic("Atual", "Direito", "2026-01-05", "", None, "")
+
+        # Cancelling while the copy is written leaves the live database alone
+        def cancel_on_write(stage, fraction):
+            if stage == "write":
+                raise BackupCancelled()
+        try:
+            stage_restore(db.db_path, backup, progress=cancel_on_write)
+            assert False, "expected BackupCancelled"
+        except BackupCancelled:
+            pass
+        assert not os.path.exists(db.db_path + ".restore")
+
+        # Staging happens off the live connection; only swap_in replaces it
+        restore_path = stage_restore(db.db_path, backup)
+        assert [t.title for t in db.get_topics()] == ["Atual"]
+        generation = db.generation
+        db.swap_in(restore_path)
+        assert not os.path.exists(restore_path)
+        assert db.generation > generation
+        assert [t.title for t in db.get_topics()] == ["Do Backup"]
+        assert db.get_schema_version() == SCHEMA_VERSION
+        db.close()
+    print("Staged restore OK.")
+
+def test_settings_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "settings.db"))
+        assert db.get_setting('skip_weekends') is False
+        assert db.get_setting('first_day_of_week') == 0
+
+        changes = []
+        db.subscribe_setting('first_day_of_week', lambda key, value: changes.append(value))
+        db.set_setting('first_day_of_week', 1)
+        db.set_setting('first_day_of_week', 1)
+        db.set_setting('skip_weekends', True)
+        assert changes == [1]
+
+        # Reads come from memory
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        assert db.get_setting('skip_weekends') is True
+        assert db.get_setting('first_day_of_week') == 1
+        db.conn.set_trace_callback(None)
+        assert statements == []
+
+        try:
+            with db.transaction():
+                db.set_setting('first_day_of_week', 0)
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+        assert db.get_setting('first_day_of_week') == 1
+        assert changes == [1, 0, 1]
+
+        db.reset_database()
+        assert db.get_setting('skip_weekends') is False
+        assert changes == [1, 0, 1, 0]
+        db.close()
+    print("Settings cache OK.")
+
+def test_topic_identity_map():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "records.db"))
+        db.add_area("Direito", "#112233")
+        topic_id = db.add_topic("Constitucional", "Direito", "2026-02-05", "Estudo", "#ff5733")
+
+        topic = db.get_topic(topic_id)
+        assert topic.title == "Constitucional" and topic.display_color == "#112233"
+        assert db.get_topics()[0] is topic
+
+        # Cached topics are answered without touching SQLite
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        assert db.get_topic(topic_id) is topic
+        db.conn.set_trace_callback(None)
+        assert statements == []
+
+        # Writes show up on the object every holder already has
+        db.update_time_spent(topic_id, 90)
+        db.update_topic(topic_id, "Administrativo", "Direito", "2026-02-06", "Estudo", None, "")
+        db.update_area(db.get_area_by_name("Direito").id, "Direito", "#445566")
+        assert (topic.title, topic.time_spent, topic.display_color) == ("Administrativo", 90, "#445566")
+
+        db.delete_topic(topic_id)
+        assert db.get_topic(topic_id) is None
+        db.close()
+    print("Topic identity map OK.")
+
+def test_today_query_is_linear():
+    """Regression benchmark: the Today list costs one query, and time per due item stays flat."""
+    import time
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "today.db"))
+        today = datetime.now().strftime('%Y-%m-%d')
+        topic_ids = db.add_topics_many([(f"Tópico {i}", "Área", "2026-01-01", "Estudo", None, "")
+                                        for i in range(5000)])
+        per_item = {}
+        for due in (30, 300):
+            db.conn.execute("DELETE FROM revisions")
+            db.add_revisions_many([(topic_id, today, 7) for topic_id in topic_ids[:due]])
+            db._topics.clear()
+
+            statements = []
+            db.conn.set_trace_callback(statements.append)
+            items = db.get_revisions_with_topics(today)
+            db.conn.set_trace_callback(None)
+            assert len(items) == due
+            assert len(statements) == 1, statements
+            assert all(topic.id == revision.topic_id for revision, topic in items)
+
+            # Best of a few runs, each with a cold identity map, to keep timer noise out
+            timings = []
+            for _ in range(5):
+                db._topics.clear()
+                started = time.perf_counter()
+                db.get_revisions_with_topics(today)
+                timings.append(time.perf_counter() - started)
+            per_item[due] = min(timings) / due
+            print(f"  {due} due items: {min(timings) * 1000:.1f} ms")
+        # Ten times the items must not cost much more than ten times the time
+        assert per_item[300] < 3 * per_item[30], per_item
+        db.close()
+    print("Today query OK.")
+
+def test_topics_carry_next_revision():
+    with tempfile.TemporaryDirectory() as tmp:
+        logic = RevisionLogic(DatabaseManager(os.path.join(tmp, "next.db")))
+        topic_ids = logic.create_topics_with_revisions_many(
+            [(f"Tópico {i}", "Área", "2026-01-05", "", None, "") for i in range(200)])
+        first_rev_id = logic.db.get_revisions_for_topic(topic_ids[0])[0].id
+        logic.mark_as_studied(first_rev_id)
+
+        statements = []
+        logic.db.conn.set_trace_callback(statements.append)
+        topics = {topic.id: topic for topic in logic.db.get_topics()}
+        logic.db.conn.set_trace_callback(None)
+        assert len(statements) == 1, statements
+
+        # The studied 0-day revision is skipped; the 7-day one is next
+        assert topics[topic_ids[0]].next_revision_date == "2026-01-12"
+        assert topics[topic_ids[1]].next_revision_date == "2026-01-05"
+        logic.db.close()
+    print("Next revision dates OK.")
+
+def test_study_time_rollups():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rollups.db")
+        logic = RevisionLogic(DatabaseManager(path))
+        math_id, art_id = logic.create_topics_with_revisions_many([
+            ("Cálculo", "Matemática", "2026-01-05", "", None, ""),
+            ("Barroco", "Artes", "2026-01-05", "", None, ""),
+        ])
+        logic.db.update_time_spent(math_id, 600)
+        logic.db.update_time_spent(math_id, 300)
+        logic.db.update_time_spent(art_id, 120)
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        statements = []
+        logic.db.conn.set_trace_callback(statements.append)
+        assert logic.db.get_total_study_time() == 1020
+        assert logic.db.get_study_time_for_date(today) == 1020
+        assert logic.db.get_study_time_between(today, today) == 1020
+        assert logic.db.get_study_time_by_area() == {"Matemática": 900, "Artes": 120}
+        logic.db.conn.set_trace_callback(None)
+        assert not any("study_sessions" in sql for sql in statements), statements
+        assert logic.db.get_topic(math_id).time_spent == 900
+
+        logic.db.close()
+
+        # A database from before the rollups is backfilled from its sessions
+        legacy_path = os.path.join(tmp, "v2.db")
+        conn = sqlite3.connect(legacy_path)
+        for step in MIGRATIONS[:2]:
+            step(conn.cursor())
+        conn.execute("INSERT INTO topics (title, area, start_date) VALUES ('Cálculo', 'Matemática', '2026-01-05')")
+        conn.execute("INSERT INTO topics (title, area, start_date) VALUES ('Barroco', 'Artes', '2026-01-05')")
+        conn.executemany("INSERT INTO study_sessions (topic_id, duration_seconds, session_date) VALUES (?, ?, ?)",
+                         [(1, 600, today), (1, 300, "2026-01-05"), (2, 120, today)])
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(legacy_path)
+        assert db.get_total_study_time() == 1020
+        assert db.get_study_time_for_date(today) == 720
+        assert db.get_study_time_between("2026-01-01", "2026-01-31") == 300
+        assert db.get_study_time_by_area() == {"Matemática": 900, "Artes": 120}
+        db.close()
+    print("Study time rollups OK.")
+
+def test_topics_reference_area_id():
+    with tempfile.TemporaryDirectory() as tmp:
+        logic = RevisionLogic(DatabaseManager(os.path.join(tmp, "areas.db")))
+        db = logic.db
+        area_id = db.add_area("Direito", "#ff0000")
+        topic_id = logic.create_topic_with_revisions("Constitucional", "Direito", "2026-01-05", "", "#0000ff")
+        # Unknown names are created on the fly
+        other_id = logic.create_topic_with_revisions("Cálculo", "Matemática", "2026-01-05", "", None)
+        assert db.get_area_by_name("Matemática") is not None
+        topic = db.get_topic(topic_id)
+        assert (topic.area, topic.area_id, topic.display_color) == ("Direito", area_id, "#ff0000")
+
+        # A rename touches one row and every view sees it
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        db.update_area(area_id, "Direito Público", "#00ff00")
+        db.conn.set_trace_callback(None)
+        assert not any("topics" in sql for sql in statements), statements
+        assert (topic.area, topic.display_color) == ("Direito Público", "#00ff00")
+        revision = logic.get_upcoming_revisions("2026-01-05")[0]
+        assert (revision.area, revision.color) == ("Direito Público", "#00ff00")
+        assert db.get_topics()[0] is topic
+
+        cursor = db.conn.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN SELECT * FROM topics WHERE area_id = ?", (area_id,))
+        plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "idx_topics_area_id" in plan, plan
+
+        # Deleting the area keeps its topics, without an area
+        db.delete_area(area_id)
+        assert (topic.area, topic.area_id, topic.display_color) == ("", None, "#0000ff")
+        db._topics.clear()
+        assert db.get_topic(topic_id).area == ""
+        assert db.get_topic(other_id).area == "Matemática"
+        db.close()
+    print("Area ids OK.")
+
+def test_deleted_topic_ids_not_reused():
+    with tempfile.TemporaryDirectory() as tmp:
+        # A version 3 database where topic 3 was deleted and left its rows behind
+        path = os.path.join(tmp, "orphans.db")
+        conn = sqlite3.connect(path)
+        for step in MIGRATIONS[:3]:
+            step(conn.cursor())
+        conn.executemany("INSERT INTO topics (title, area, start_date) VALUES (?, 'Área', '2026-01-05')",
+                         [("Um",), ("Dois",), ("Três",)])
+        conn.executemany("INSERT INTO revisions (topic_id, scheduled_date, interval_days) VALUES (3, ?, ?)",
+                         [("2026-01-12", 7), ("2026-01-20", 15)])
+        conn.execute("INSERT INTO study_sessions (topic_id, duration_seconds, session_date) VALUES (3, 60, '2026-01-06')")
+        conn.execute("DELETE FROM topics WHERE id = 3")
+        conn.execute("PRAGMA user_version = 3")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(path)
+        new_id = db.add_topic("Novo", "Área", "2026-02-01", "", None, "")
+        assert new_id == 4
+        assert db.conn.execute("SELECT COUNT(*) FROM revisions").fetchone()[0] == 0
+        assert db.conn.execute("SELECT COUNT(*) FROM study_sessions").fetchone()[0] == 0
+
+        # Deleting a topic takes its revisions and sessions along
+        db.add_revision(new_id, "2026-02-08", 7)
+        db.update_time_spent(new_id, 120)
+        db.delete_topic(new_id)
+        for table in ("revisions", "study_sessions", "topic_tags"):
+            assert db.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE topic_id = ?", (new_id,)).fetchone()[0] == 0
+        # Time already studied still counts
+        assert db.get_total_study_time() == 120
+        db.close()
+    print("Deleted topic ids OK.")
+
+def test_topic_tags():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Comma strings from before the junction table are split into tags
+        path = os.path.join(tmp, "tags.db")
+        conn = sqlite3.connect(path)
+        for step in MIGRATIONS[:4]:
+            step(conn.cursor())
+        conn.executemany("INSERT INTO topics (title, start_date, tags) VALUES (?, '2026-01-05', ?)",
+                         [("Constitucional", "concurso, essencial"), ("Penal", "concurso"), ("Cálculo", "")])
+        conn.execute("PRAGMA user_version = 4")
+        conn.commit()
+        conn.close()
+
+        logic = RevisionLogic(DatabaseManager(path))
+        db = logic.db
+        assert {t.title: t.tags for t in db.get_topics()} == {
+            "Constitucional": "concurso,essencial", "Penal": "concurso", "Cálculo": None}
+        assert sorted(t.name for t in db.get_managed_tags()) == ["concurso", "essencial"]
+
+        logic.create_topics_with_revisions_many(
+            [(f"Extra {i}", "", "2026-01-05", "concurso,revisão", None, "") for i in range(3)])
+        titles = lambda topics: sorted(t.title for t in topics)
+        assert titles(db.get_topics_by_tags(any_of=["essencial", "revisão"])) == [
+            "Constitucional", "Extra 0", "Extra 1", "Extra 2"]
+        assert titles(db.get_topics_by_tags(all_of=["concurso", "essencial"])) == ["Constitucional"]
+        assert titles(db.get_topics_by_tags(any_of=["essencial", "revisão"], all_of=["concurso", "revisão"])) == [
+            "Extra 0", "Extra 1", "Extra 2"]
+
+        cursor = db.conn.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN SELECT topic_id FROM topic_tags WHERE tag_id = ?", (1,))
+        plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "idx_topic_tags_tag" in plan, plan
+
+        # Edits, tag renames and deletions reach the mapped topics
+        penal = next(t for t in db.get_topics() if t.title == "Penal")
+        db.update_topic(penal.id, penal.title, "", penal.start_date, "essencial", None, "")
+        assert penal.tags == "essencial"
+        db.update_managed_tag(db.get_tag_by_name("essencial").id, "core", None)
+        assert penal.tags == "core"
+        db.delete_managed_tag(db.get_tag_by_name("core").id)
+        assert penal.tags is None
+        assert titles(db.get_topics_by_tags(all_of=["concurso"])) == [
+            "Constitucional", "Extra 0", "Extra 1", "Extra 2"]
+
+        # Tags keep the order they were entered in, not their id order
+        db.update_topic(penal.id, penal.title, "", penal.start_date, "revisão, concurso", None, "")
+        assert penal.tags == "revisão,concurso"
+        db._topics.clear()
+        assert db.get_topic(penal.id).tags == "revisão,concurso"
+        db.update_managed_tag(db.get_tag_by_name("revisão").id, "revisar", None)
+        assert db.get_topic(penal.id).tags == "revisar,concurso"
+        db.close()
+    print("Topic tags OK.")
+
+def test_topic_search():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "search.db"))
+        calc_id = db.add_topic("Cálculo Diferencial", "Matemática", "2026-01-05", "", None, "Limites e derivadas")
+        db.add_topic("Álgebra Linear", "Matemática", "2026-01-05", "", None, "Matrizes; usada em cálculo numérico")
+        penal_id = db.add_topic("Direito Penal", "Direito", "2026-01-05", "", None, "")
+
+        # Accent-folded prefix match; a title hit outranks a description hit
+        results = db.search_topics("calc")
+        assert [t.title for t, _ in results] == ["Cálculo Diferencial", "Álgebra Linear"]
+        assert f"{SNIPPET_START}Cálculo{SNIPPET_END}" in results[0][1]
+        assert [t.title for t, _ in db.search_topics("DERIV lim")] == ["Cálculo Diferencial"]
+        assert db.search_topics("calc", limit=1)[0][0] is db.get_topic(calc_id)
+        assert db.search_topics('"') == [] and db.search_topics("   ") == []
+
+        # Triggers keep the index in step with edits and deletes
+        db.update_topic(penal_id, "Direito Processual", "Direito", "2026-01-05", "", None, "Recursos")
+        assert db.search_topics("penal") == []
+        assert [t.id for t, _ in db.search_topics("recurso")] == [penal_id]
+        db.update_time_spent(penal_id, 60)
+        db.delete_topic(calc_id)
+        assert [t.title for t, _ in db.search_topics("calc")] == ["Álgebra Linear"]
+        cursor = db.conn.cursor()
+        cursor.execute("INSERT INTO topics_fts (topics_fts) VALUES ('integrity-check')")
+        db.close()
+    print("Topic search OK.")
+
+def test_month_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "months.db"))
+        logic = RevisionLogic(db)
+        topic_id = db.add_topic("Cálculo", "Matemática", "2026-01-05", "", None, "")
+        db.add_revision(topic_id, "2026-03-10", 7)
+
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        queries = lambda: sum("FROM revisions" in statement for statement in statements)
+        march = logic.get_month_revisions(2026, 3)
+        assert [rev.topic_id for rev in march["2026-03-10"]] == [topic_id]
+        revision_id = march["2026-03-10"][0].id
+        assert logic.get_month_revisions(2026, 3) is march
+        assert queries() == 1, statements
+
+        # Least recently used months fall out first
+        for month in range(4, 4 + MONTH_CACHE_SIZE):
+            logic.get_month_revisions(2026, month)
+        assert queries() == 1 + MONTH_CACHE_SIZE
+        logic.get_month_revisions(2026, 3)
+        assert queries() == 2 + MONTH_CACHE_SIZE
+        db.conn.set_trace_callback(None)
+
+        # Any commit makes the cached months stale
+        generation = db.generation
+        logic.mark_as_studied(revision_id)
+        assert db.generation > generation
+        assert logic.get_month_revisions(2026, 3)["2026-03-10"][0].status == "studied"
+
+        # So do commits from another connection, such as the bulk importer's
+        assert "2026-04-02" not in logic.get_month_revisions(2026, 4)
+        other = sqlite3.connect(db.db_path)
+        other.execute("INSERT INTO revisions (topic_id, scheduled_date, interval_days) VALUES (?, '2026-04-02', 1)",
+                      (topic_id,))
+        other.commit()
+        other.close()
+        assert [rev.topic_id for rev in logic.get_month_revisions(2026, 4)["2026-04-02"]] == [topic_id]
+
+        # And an explicit clear
+        april = logic.get_month_revisions(2026, 4)
+        logic.clear_month_cache()
+        assert logic.get_month_revisions(2026, 4) is not april
+        db.close()
+    print("Month cache OK.")
+
 if __name__ == "__main__":
     test_revision_logic()
+    test_schema_migrations()
+    test_one_commit_per_action()
+    test_bulk_import_chunks()
+    test_encrypted_backup_container()
+    test_incremental_snapshots()
+    test_staged_restore()
+    test_settings_cache()
+    test_topic_identity_map()
+    test_today_query_is_linear()
+    test_topics_carry_next_revision()
+    test_study_time_rollups()
+    test_topics_reference_area_id()
+    test_deleted_topic_ids_not_reused()
+    test_topic_tags()
+    test_topic_search()
+    test_month_cache()
@@ -26,8 +26,8 @@ def test_db():
     areas = db.get_areas()
     found = False
     for a in areas:
-        if a[0] == aid:
-            assert a[2] == "#FF0000", f"Expected color #FF0000, got {a[2]}"
+        if a.id == aid:
+            assert a.color == "#FF0000", f"Expected color #FF0000, got {a.color}"
             found = True
             break
     assert found
@@ -41,8 +41,8 @@ def test_db():
     tags = db.get_managed_tags()
     found = False
     for t in tags:
-        if t[0] == tid:
-            assert t[2] == "#00FF00", f"Expected color #00FF00, got {t[2]}"
+        if t.id == tid:
+            assert t.color == "#00FF00", f"Expected color #00FF00, got {t.color}"
             found = True
             break
     assert found
@@ -62,9 +62,8 @@ def test_db():
     topics = db.get_topics()
     t_found = False
     for t in topics:
-        if t[0] == topic_id:
-            # index 7 should be area color #FF0000
-            if len(t) > 7 and t[7] == "#FF0000":
+        if t.id == topic_id:
+            if t.area_color == "#FF0000":
                 t_found = True
             else:
                  print(f"Topic tuple: {t}")
@@ -81,10 +80,10 @@ def test_db():
     # So I'll just check if I can run the query manually using the same SQL as models.py
     cursor = db.conn.cursor()
     cursor.execute('''
-        SELECT r.id, r.topic_id, r.scheduled_date, r.status, r.interval_days, t.title, t.area, COALESCE(a.color, t.color)
+        SELECT r.id, r.topic_id, r.scheduled_date, r.status, r.interval_days, t.title, COALESCE(a.name, ''), COALESCE(a.color, t.color)
         FROM revisions r
         JOIN topics t ON r.topic_id = t.id
-        LEFT JOIN areas a ON t.area = a.name
+        LEFT JOIN areas a ON a.id = t.area_id
         WHERE r.scheduled_date = ?
     ''', (today,))
     revs = cursor.fetchall()